@@ -0,0 +1,99 @@
+"""
+Token-budgeted chat history for the chat prompt.
+
+The last turns of a conversation are rendered verbatim; older turns are folded
+into a rolling summary kept in agent state, so the chat prompt stays within a
+fixed token budget however long the session runs.
+"""
+import threading
+from src.app.core.log_config import setup_logging
+
+try:
+    import tiktoken
+except ImportError:  # optional: fall back to an estimate
+    tiktoken = None
+
+logger = setup_logging("CHAT HISTORY")
+
+CHARS_PER_TOKEN = 4
+
+class TokenCounter:
+    """
+    Counts tokens with the model's tiktoken encoding, or estimates them
+    (about four characters per token) when the encoding is unavailable.
+
+    :param encoding_name: tiktoken encoding of the deployed model, e.g. "o200k_base".
+        The encoding is loaded (and downloaded, unless it is in TIKTOKEN_CACHE_DIR) by load(),
+        or by the first count, so that importing the agent never waits for the network.
+    """
+    def __init__(self, encoding_name: str):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        """Load the encoding; only the first call does any work."""
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                if tiktoken is None:
+                    logger.warning("tiktoken is not installed; estimating chat history tokens.")
+                else:
+                    self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:
+                logger.warning("Could not load tokenizer %s, estimating chat history tokens: %s", self.encoding_name, e)
+            finally:
+                self._loaded = True
+
+    def count(self, text: str) -> int:
+        """Return the number of tokens in text."""
+        if not text:
+            return 0
+        if not self._loaded:
+            self.load()
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        return -(-len(text) // CHARS_PER_TOKEN)
+
+    def count_messages(self, messages: list[dict]) -> int:
+        """Return the number of tokens the messages take in the chat prompt, which renders the list as str(messages)."""
+        return self.count(str(messages))
+
+class HistoryWindow:
+    """
+    Splits chat history into turns to fold into the summary and turns to keep verbatim.
+
+    :param counter: token counter used to measure the history.
+    :param token_budget: maximum tokens for the summary plus the verbatim turns.
+    :param keep_turns: number of recent agent/user turns kept verbatim when over budget.
+    """
+    def __init__(self, counter: TokenCounter, token_budget: int, keep_turns: int):
+        self.counter = counter
+        self.token_budget = token_budget
+        self.keep_messages = 2 * keep_turns
+
+    def size(self, summary: str, messages: list[dict]) -> int:
+        """Return the tokens the summary and messages take together."""
+        return self.counter.count(summary) + self.counter.count_messages(messages)
+
+    def split(self, summary: str, messages: list[dict]) -> tuple[list[dict], list[dict]]:
+        """
+        Return (to_fold, verbatim) for the messages not yet in the summary.
+        Nothing is folded while everything fits the budget.
+        """
+        if self.size(summary, messages) <= self.token_budget:
+            return [], messages
+        cut = max(len(messages) - self.keep_messages, 0)
+        to_fold, verbatim = messages[:cut], messages[cut:]
+        while len(verbatim) > 1 and self.size(summary, verbatim) > self.token_budget:
+            to_fold.append(verbatim.pop(0))
+        return to_fold, verbatim
+
+    def fit(self, summary: str, messages: list[dict]) -> list[dict]:
+        """Drop the oldest verbatim messages until summary and messages fit the budget (keeps at least one)."""
+        messages = list(messages)
+        while len(messages) > 1 and self.size(summary, messages) > self.token_budget:
+            messages.pop(0)
+        return messages
@@ -0,0 +1,50 @@
+"""
+Compact representation of the FRIA agent state.
+
+Every channel a node writes is checkpointed, so the values written on most
+node transitions are kept small:
+- the four towing form fields live in fixed slots ordered as FORM_FIELDS, each
+  a [status, value] pair with an int-coded FieldStatus, instead of the
+  towing_form and fields_processed dicts (views of both are derived here);
+- chat messages are (role, content) pairs kept in a DeltaChannel: a node
+  returns only the messages it appends, a checkpoint stores those writes, and
+  the full list is snapshotted every MESSAGES_SNAPSHOT_FREQUENCY appends.
+"""
+from enum import IntEnum
+from typing import Any, Sequence
+
+FORM_FIELDS = ("incident", "operability", "vehicle_condition", "battery_condition")
+MESSAGES_SNAPSHOT_FREQUENCY = 20
+
+class FieldStatus(IntEnum):
+    """Processing status of a form slot."""
+    NOT_PROCESSED = 0
+    PROCESSED = 1
+
+def empty_form() -> list[list]:
+    """Return form slots with every field not processed and empty."""
+    return [[FieldStatus.NOT_PROCESSED.value, ""] for _ in FORM_FIELDS]
+
+def fill_field(form: Sequence[Sequence] | None, field: str, value: Any) -> list[list]:
+    """Return a copy of form with field set to value and marked processed; unknown fields are ignored."""
+    slots = [list(slot) for slot in form or empty_form()]
+    if field not in FORM_FIELDS:
+        return slots
+    slots[FORM_FIELDS.index(field)] = [FieldStatus.PROCESSED.value, value]
+    return slots
+
+def towing_form(form: Sequence[Sequence] | None) -> dict[str, Any]:
+    """Return the towing form as a field -> value dict."""
+    return {field: slot[1] for field, slot in zip(FORM_FIELDS, form or empty_form())}
+
+def fields_processed(form: Sequence[Sequence] | None) -> dict[str, str]:
+    """Return the field -> "PROCESSED"/"NOT_PROCESSED" view used by the prompts."""
+    return {field: FieldStatus(slot[0]).name for field, slot in zip(FORM_FIELDS, form or empty_form())}
+
+def append_messages(messages: list, writes: Sequence[Sequence]) -> list:
+    """DeltaChannel reducer: append every batch of (role, content) messages in order."""
+    return [*messages, *(tuple(message) for batch in writes for message in batch)]
+
+def chat_messages(messages: Sequence) -> list[dict]:
+    """Return messages as role/content dicts for prompt rendering."""
+    return [{"role": role, "content": content} for role, content in messages]
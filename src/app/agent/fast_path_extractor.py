@@ -0,0 +1,136 @@
+"""
+Rule-based extractor for trivially parseable chat answers.
+
+Short answers such as "yes"/"no" for operability or "dead"/"low" for
+battery_condition are matched against a small lexicon. A confident match lets
+the agent skip the LLM extraction and validation calls for that turn; anything
+else falls back to the LLM.
+"""
+import re
+from dataclasses import dataclass
+from src.app.core.log_config import setup_logging
+from src.app.core.metrics import FAST_PATH_LOOKUPS
+
+logger = setup_logging("FAST PATH EXTRACTOR")
+
+# field -> canonical value -> phrases that mean it
+FIELD_LEXICON: dict[str, dict[str, list[str]]] = {
+    "operability": {
+        "yes": ["yes", "yeah", "yep", "yup", "sure", "it can", "it can move", "it moves", "it drives",
+                "it's drivable", "it is drivable", "drivable", "still drives", "still runs"],
+        "no": ["no", "nope", "nah", "it can't", "it cannot", "it can not", "can't move", "cannot move",
+               "won't move", "doesn't move", "does not move", "not drivable", "undrivable", "won't drive",
+               "stuck"],
+    },
+    "battery_condition": {
+        "dead": ["dead", "completely dead", "totally dead", "flat", "zero", "0%", "empty"],
+        "low": ["low", "very low", "almost empty", "almost dead", "nearly dead", "running low"],
+        "fine": ["fine", "ok", "okay", "good", "full", "normal", "charged", "fully charged"],
+        "not charging": ["not charging", "won't charge", "doesn't charge", "isn't charging"],
+        "drain": ["drain", "draining", "drained", "drains fast"],
+    },
+}
+
+HEDGES = re.compile(r"(?<![\w'])(maybe|perhaps|probably|not sure|unsure|i think|i guess|don't know|dont know|no idea|kind of|sort of)(?![\w'])")
+NEGATIONS = re.compile(r"(?<![\w'])(not|no|never|isn't|wasn't|won't|can't|doesn't|don't)(?![\w'])")
+SHORT_ANSWER_WORDS = 6
+
+@dataclass(frozen=True)
+class FastPathMatch:
+    """A value extracted without the LLM and how confident the rules are about it."""
+    field: str
+    value: str
+    confidence: float
+
+def _normalize(text: str) -> str:
+    """Lowercase the answer and strip punctuation that does not change its meaning."""
+    text = text.lower().replace("’", "'")
+    text = re.sub(r"[^\w%'\s]", " ", text)
+    return " ".join(text.split())
+
+def _phrase_pattern(phrase: str) -> re.Pattern:
+    return re.compile(rf"(?<![\w']){re.escape(phrase)}(?![\w'])")
+
+_PATTERNS = {
+    field: {value: [_phrase_pattern(phrase) for phrase in phrases] for value, phrases in values.items()}
+    for field, values in FIELD_LEXICON.items()
+}
+
+def score_answer(field: str | None, user_response: str | None) -> FastPathMatch | None:
+    """
+    Match a chat answer for field against the lexicon.
+
+    Returns None when the field is not covered, nothing matches, or the answer
+    matches more than one value; otherwise the value with a confidence in [0, 1].
+    """
+    if field not in _PATTERNS or not user_response:
+        return None
+    text = _normalize(user_response)
+    matched = {
+        value: [pattern for pattern in patterns if pattern.search(text)]
+        for value, patterns in _PATTERNS[field].items()
+    }
+    matched = {value: patterns for value, patterns in matched.items() if patterns}
+    if len(matched) != 1:
+        return None
+    value, patterns = next(iter(matched.items()))
+    remainder = text
+    for pattern in patterns:
+        remainder = pattern.sub(" ", remainder)
+
+    if text in FIELD_LEXICON[field][value]:
+        confidence = 1.0
+    elif HEDGES.search(text) or NEGATIONS.search(remainder):
+        confidence = 0.3
+    elif len(text.split()) <= SHORT_ANSWER_WORDS:
+        confidence = 0.85
+    else:
+        confidence = 0.5
+    return FastPathMatch(field=field, value=value, confidence=confidence)
+
+class FastPathExtractor:
+    """
+    Consulted before the LLM extraction and validation calls of a chat turn.
+
+    :param min_confidence: matches below this confidence fall back to the LLM.
+    """
+    def __init__(self, min_confidence: float):
+        self.min_confidence = min_confidence
+        self.lookups = 0
+        self.hits = 0
+        self.llm_calls_avoided = 0
+
+    def match(self, field: str | None, user_response: str | None) -> FastPathMatch | None:
+        """Return a confident match for the answer without counting the lookup."""
+        match = score_answer(field, user_response)
+        return match if match is not None and match.confidence >= self.min_confidence else None
+
+    def lookup(self, field: str | None, user_response: str | None, llm_calls: int = 1) -> FastPathMatch | None:
+        """Return a confident match for the answer, counting the lookup and, on a hit, the llm_calls it avoids."""
+        self.lookups += 1
+        match = self.match(field, user_response)
+        if match is None:
+            FAST_PATH_LOOKUPS.labels(result="miss").inc()
+            return None
+        self.hits += 1
+        FAST_PATH_LOOKUPS.labels(result="hit").inc()
+        self.llm_calls_avoided += llm_calls
+        logger.info(
+            "Fast path matched %s=%r (confidence %.2f); hit rate %.1f%%, LLM calls avoided %d",
+            match.field, match.value, match.confidence, 100 * self.hit_rate, self.llm_calls_avoided,
+        )
+        return match
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered without the LLM."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def stats(self) -> dict:
+        """Return lookup, hit and avoided-call counters."""
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate,
+            "llm_calls_avoided": self.llm_calls_avoided,
+        }
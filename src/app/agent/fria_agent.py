@@ -1,18 +1,36 @@
 """FRIA Agent Module"""
 import os
-import json
-import asyncio
-from typing import TypedDict, Optional, List, Dict, Any
+from typing import TypedDict, Optional, List, Dict, Any, Annotated
 #from langchain_core.runnables.graph import MermaidDrawMethod
 from langgraph.graph import StateGraph, END, START
+from langgraph.channels import DeltaChannel
+from langgraph.config import get_stream_writer
 from langgraph.checkpoint.memory import InMemorySaver
-from langchain_core.messages import (AIMessage, HumanMessage, BaseMessage)
+from langchain_core.runnables import RunnableConfig
 from jinja2 import Environment, FileSystemLoader
+from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
+from src.app.core.metrics import timed_node, LLM_JSON_PARSE_FAILURES
+from src.app.core.llm_usage import collect_usage, add_records
+from src.app.agent.fast_path_extractor import FastPathExtractor, FastPathMatch
+from src.app.agent.structured_output import JSONResponseError, parse_json_response, repair_messages, response_format
+from src.app.agent.speculation import SpeculativeQuestions, expected_state_key
+from src.app.agent.compact_state import (MESSAGES_SNAPSHOT_FREQUENCY, append_messages, chat_messages,
+                                         empty_form, fields_processed, fill_field)
+from src.app.agent.chat_history import TokenCounter, HistoryWindow
 from src.app.infrastructure.clients.azure_openai_client import AzureOpenAIClient
+from src.app.infrastructure.clients.sql_client import SQLClient
+from src.app.infrastructure.db.checkpoint_store import PostgresCheckpointSaver
 
 logger = setup_logging("FRIA AGENT")
 llm = AzureOpenAIClient()
+fast_path = FastPathExtractor(min_confidence=settings.FAST_PATH_MIN_CONFIDENCE)
+history_window = HistoryWindow(
+    TokenCounter(settings.TOKENIZER_ENCODING),
+    token_budget=settings.CHAT_HISTORY_TOKEN_BUDGET,
+    keep_turns=settings.CHAT_HISTORY_KEEP_TURNS,
+)
+speculative_questions = SpeculativeQuestions(ttl_seconds=settings.SPECULATION_TTL_SECONDS)
 
 base_dir = os.path.dirname(os.path.dirname(__file__))
 prompt_templates_path = os.path.join(base_dir, "prompt_management")
@@ -26,8 +44,7 @@ class FRIAgent(TypedDict):
     extracted_information: Dict[str, Any]
     agent_query: Optional[str]
     human_sentiment: Optional[str]
-    fields_processed: Optional[Dict[str, Any]]
-    towing_form: Optional[Dict[str, Any]]
+    form: Optional[List[list]]
     vehicle_type: Optional[str]
     lat: Optional[float]
     lon: Optional[float]
@@ -36,37 +53,80 @@ class FRIAgent(TypedDict):
     data_validation_status: Optional[bool]
     final_audio_validation_status: Optional[str]
     next_field_to_process: Optional[str]
-    towing_form: Optional[Dict[str, Any]]
-    messages: List[BaseMessage]
+    messages: Annotated[List[tuple], DeltaChannel(append_messages, snapshot_frequency=MESSAGES_SNAPSHOT_FREQUENCY)]
+    history_summary: Optional[str]
+    summarized_messages: Optional[int]
 
 def load_template(template_name: str, input_data: dict) -> str:
     """Load and render a Jinja2 prompt template."""
     template = env.get_template(template_name)
     return template.render(**input_data)
 
-def init_mode(state: FRIAgent) -> FRIAgent:
+def fast_path_match(state: FRIAgent, llm_calls: int = 0) -> FastPathMatch | None:
+    """
+    Return a confident rule-based answer for the current chat field, if there is one.
+
+    :param llm_calls: LLM calls of the turn a match avoids. Only the node consulting the fast path
+        first on a turn passes it, so that each turn counts as one lookup in the fast path stats.
+    """
+    if not settings.FAST_PATH_ENABLED or state.get("mode") != "chat":
+        return None
+    if llm_calls:
+        return fast_path.lookup(state.get("next_field_to_process"), state.get("user_response"), llm_calls)
+    return fast_path.match(state.get("next_field_to_process"), state.get("user_response"))
+
+async def complete_template(template_name: str, input_data: dict) -> str:
+    """Render a prompt template and return the LLM completion for it."""
+    prompt = load_template(template_name, input_data)
+    return await llm.get_chat_response([{"role": "user", "content": prompt}], template_name=template_name)
+
+async def complete_json_template(template_name: str, input_data: dict) -> dict:
+    """
+    Render a prompt template, request the completion in structured output mode and return the parsed JSON object.
+    An unparseable reply gets one repair request; only replies that parse are cached.
+
+    :raises JSONResponseError: if the repaired reply does not parse either.
+    """
+    messages = [{"role": "user", "content": load_template(template_name, input_data)}]
+    output_format = response_format(template_name, settings.LLM_STRUCTURED_OUTPUT)
+    def parse(response: str) -> dict:
+        return parse_json_response(template_name, response)
+    response = await llm.get_chat_response(messages, template_name=template_name, response_format=output_format,
+                                           validate=parse)
+    try:
+        return parse(response)
+    except JSONResponseError as e:
+        LLM_JSON_PARSE_FAILURES.labels(template=template_name, attempt="first").inc()
+        logger.warning("Unparseable %s reply (%s), asking for a repair.", template_name, e)
+        response = await llm.get_chat_response(repair_messages(messages, response, e), template_name=template_name,
+                                               response_format=output_format, validate=parse)
+    try:
+        return parse(response)
+    except JSONResponseError:
+        LLM_JSON_PARSE_FAILURES.labels(template=template_name, attempt="repair").inc()
+        raise
+
+async def stream_template(template_name: str, input_data: dict) -> str:
+    """Render a prompt template, emit each completion token on the graph's custom stream and return the full text."""
+    prompt = load_template(template_name, input_data)
+    writer = get_stream_writer()
+    tokens = []
+    async for token in llm.stream_chat_response([{"role": "user", "content": prompt}], template_name=template_name):
+        writer({"token": token})
+        tokens.append(token)
+    return "".join(tokens)
+
+@timed_node
+def init_mode(state: FRIAgent) -> dict:
     """Initialize the agent's mode based on user input."""
     agent_state = state.get("agent_state", "initiate")
     if agent_state == "initiate":
         logger.info("Initializing agent mode based on user input.")
-        fields_processed = {
-                    "incident": "NOT_PROCESSED",
-                    "operability": "NOT_PROCESSED",
-                    "vehicle_condition": "NOT_PROCESSED",
-                    "battery_condition": "NOT_PROCESSED"
-            }
-        state["fields_processed"] = fields_processed
-        towing_form = {
-                    "incident": "",
-                    "operability": "",
-                    "vehicle_condition": "",
-                    "battery_condition": ""
-            }
-        state["towing_form"] = towing_form
-        if "messages" not in state:
-            state["messages"] = []
-            state["messages"].append(AIMessage(content="Agent initiated."))
-    return state
+        update = {"form": empty_form()}
+        if not state.get("messages"):
+            update["messages"] = [("ai", "Agent initiated.")]
+        return update
+    return {}
 
 def route_to_chat_or_audio(state: FRIAgent) -> str:
     """route to chat or audio based on mode."""
@@ -83,48 +143,50 @@ def route_to_chat_or_audio(state: FRIAgent) -> str:
             return "chat_mode"
         return "chat_mode"
     except Exception as e:
-        logger.error("Error deciding mode: %e", e)
+        logger.error("Error deciding mode: %s", e)
         return "chat_mode"
 
-def detect_human_sentiment(state: FRIAgent) -> FRIAgent:
-    """Detect human sentiment from audio transcription."""
+@timed_node
+async def detect_human_sentiment(state: FRIAgent) -> dict:
+    """Detect human sentiment from audio transcription.
+
+    Runs in parallel with extract_info_from_audio, so only the updated key is returned.
+    """
     logger.info("Detecting human sentiment from user response.")
     try:
         transcription = state.get("transcription", "")
         vehicle_type = state.get("vehicle_type", "")
-        prompt = load_template("analyse_user_sentiment.j2", {
+        response = await complete_template("analyse_user_sentiment.j2", {
             "transcription_text": transcription,
             "vehicle_type": vehicle_type
         })
-        response = asyncio.run(llm.get_chat_response([{"role": "user", "content": prompt}]))
         sentiment = response.strip()
         print("Detected sentiment:", sentiment)
-        state["human_sentiment"] = sentiment
         logger.info("Human sentiment detected successfully: %s", sentiment)
-        return state
+        return {"human_sentiment": sentiment}
     except Exception as e:
-        logger.error("Error detecting human sentiment: %e", e)
-        state["human_sentiment"] = "neutral"
-        return state
+        logger.error("Error detecting human sentiment: %s", e)
+        return {"human_sentiment": "neutral"}
 
-def reset_mode(state: FRIAgent) -> FRIAgent:
+@timed_node
+def reset_mode(state: FRIAgent) -> dict:
     """Reset the agent's mode to chat."""
     logger.info("Deciding on agent mode based on user mode.")
     try:
         mode = state.get("mode", "")
-        field_to_be_processed = [field for field, status in state["fields_processed"].items() if status == "NOT_PROCESSED"]
-        state["next_field_to_process"] = field_to_be_processed[0] if field_to_be_processed else None
+        field_to_be_processed = [field for field, status in fields_processed(state["form"]).items() if status == "NOT_PROCESSED"]
+        update = {"next_field_to_process": field_to_be_processed[0] if field_to_be_processed else None}
         agent_state = state.get("agent_state", "")
         if mode == "audio" and agent_state == "in_progress":
             logger.info("Resetting mode to chat after audio processing.")
-            state["mode"] = "chat"
-            return state
-        return state
+            update["mode"] = "chat"
+        return update
     except Exception as e:
-        logger.error("Error deciding mode: %e", e)
-        return state
+        logger.error("Error deciding mode: %s", e)
+        return {}
 
-def get_inputs_for_mode(state: FRIAgent) -> FRIAgent:
+@timed_node
+def get_inputs_for_mode(state: FRIAgent) -> dict:
     """Get user inputs based on the selected mode."""
     logger.info("Getting user inputs based on selected mode.")
     mode = state.get("mode", "")
@@ -134,23 +196,26 @@ def get_inputs_for_mode(state: FRIAgent) -> FRIAgent:
         if not all([transcription, vehicle_type]):
             logger.warning("Missing transcription or vehicle type for audio mode.")
             raise ValueError("Missing transcription or vehicle type")
-        state["transcription"] = transcription
-        state["vehicle_type"] = vehicle_type
-        if "messages" not in state:
-            state["messages"] = []
-        return state
-    return state
-
-def extract_info_from_transcription(state: FRIAgent) -> FRIAgent:
-    """Extract structured information from audio transcription."""
+    return {}
+
+@timed_node
+async def extract_info_from_transcription(state: FRIAgent) -> dict:
+    """Extract structured information from audio transcription.
+
+    Also runs as the extract_info_from_audio branch next to detect_human_sentiment,
+    so only the updated key is returned.
+    """
     logger.info("Extracting information from transcription.")
+    match = fast_path_match(state, llm_calls=2)  # a match also validates itself in validate_extracted_info
+    if match:
+        return {"extracted_information": {match.field: match.value}}
     try:
         mode = state.get("mode", "")
         transcription = state.get("transcription", "")
         vehicle_type = state.get("vehicle_type", "")
         agent_query = state.get("agent_query", "")
         user_response = state.get("user_response", "")
-        prompt = load_template("info_extraction_prompt.j2",
+        info = await complete_json_template("info_extraction_prompt.j2",
             {"transcription": transcription,
             "vehicle_type": vehicle_type,
             "mode": mode,
@@ -158,17 +223,14 @@ def extract_info_from_transcription(state: FRIAgent) -> FRIAgent:
             "user_response": user_response,
             "fields_to_extract": state.get("next_field_to_process", "")}
         )
-        response = asyncio.run(llm.get_chat_response([{"role": "user", "content": prompt}]))
-        info = json.loads(response)
-        state["extracted_information"] = info
         logger.info("Key information from audio is extracted successfully")
-        return state
+        return {"extracted_information": info}
     except Exception as e:
-        logger.error("Error extracting information: %e", e)
-        state["extracted_information"] = {}
-        return state
+        logger.error("Error extracting information: %s", e)
+        return {"extracted_information": {}}
 
-def validate_extracted_info(state: FRIAgent) -> FRIAgent:
+@timed_node
+async def validate_extracted_info(state: FRIAgent) -> dict:
     """Validate the extracted information."""
     logger.info("Validating extracted information.")
     try:
@@ -177,110 +239,205 @@ def validate_extracted_info(state: FRIAgent) -> FRIAgent:
         user_response = state.get("user_response", "")
         agent_query = state.get("agent_query", "")
         extracted_info = state.get("extracted_information", {})
+        match = fast_path_match(state)
+        if match and extracted_info.get(match.field) == match.value:
+            logger.info("Extracted information validated by the fast path.")
+            return {"validation_status": {match.field: "SUCCESSED"}}
         if mode == "audio" and final_audio_validation_status == "FAILED":
-            prompt = load_template("validation_agent_prompt.j2", {
+            validation_result = await complete_json_template("validation_agent_prompt.j2", {
                 "mode": "chat",
                 "user_response": user_response,
                 "agent_query": agent_query,
                 "extracted_data": extracted_info,
                 "field_to_validate": state.get("next_field_to_process", "")
             })
-            response = asyncio.run(llm.get_chat_response([{"role": "user", "content": prompt}]))
-            validation_result = json.loads(response)
-            state["validation_status"] = validation_result
             logger.info("Extracted information validated successfully in chat mode after audio failure.")
-            return state
+            return {"validation_status": validation_result}
         if mode == "audio":
             audio_transcription = state["transcription"]
-            prompt = load_template("validation_agent_prompt.j2", {
+            input_data = {
                 "mode": "audio",
                 "transcription": audio_transcription,
                 "extracted_data": extracted_info
-            })
-        if mode == "chat":
-            prompt = load_template("validation_agent_prompt.j2", {
+            }
+        elif mode == "chat":
+            input_data = {
                 "mode": "chat",
                 "user_response": user_response,
                 "agent_query": agent_query,
                 "extracted_data": extracted_info,
                 "field_to_validate": state.get("next_field_to_process", "")
-            })
-        response = asyncio.run(llm.get_chat_response([{"role": "user", "content": prompt}]))
-        validation_result = json.loads(response)
-        state["validation_status"] = validation_result
+            }
+        else:
+            raise ValueError(f"Unsupported mode: {mode}")
+        validation_result = await complete_json_template("validation_agent_prompt.j2", input_data)
         logger.info("Extracted information validated successfully.")
-        return state
+        return {"validation_status": validation_result}
     except Exception as e:
-        logger.error("Error validating information: %e", e)
-        state["validation_status"] = {"status": "incomplete"}
-        return state
+        logger.error("Error validating information: %s", e)
+        return {"validation_status": {"status": "incomplete"}}
 
-def update_towing_form(state: FRIAgent) -> FRIAgent:
+@timed_node
+async def extract_and_validate_info(state: FRIAgent) -> dict:
+    """Extract and validate the answer for the current field with a single LLM call (chat turns)."""
+    logger.info("Extracting and validating information in one call.")
+    match = fast_path_match(state, llm_calls=1)
+    if match:
+        return {"extracted_information": {match.field: match.value}, "validation_status": {match.field: "SUCCESSED"}}
+    try:
+        result = await complete_json_template("extract_and_validate_prompt.j2", {
+            "agent_question": state.get("agent_query", ""),
+            "user_response": state.get("user_response", ""),
+            "field_to_extract": state.get("next_field_to_process", "")
+        })
+        logger.info("Information extracted and validated successfully.")
+        return {"extracted_information": result["extracted_information"], "validation_status": result["validation_status"]}
+    except Exception as e:
+        logger.error("Error extracting and validating information: %s", e)
+        return {"extracted_information": {}, "validation_status": {"status": "incomplete"}}
+
+@timed_node
+def update_towing_form(state: FRIAgent) -> dict:
     """Update the towing form based on validated information."""
     logger.info("Updating towing form based on validated information.")
     try:
         mode = state["mode"]
-        towing_form = state["towing_form"]
+        form = state["form"]
         validation_status = state["validation_status"]
         extracted_information = state.get("extracted_information", {})
-        fields_processed = state["fields_processed"]
         final_audio_validation_status = state.get("final_audio_validation_status", "")
         if mode == "audio" and final_audio_validation_status == "FAILED":
             field, value = tuple(validation_status.items())[0]
             if value == "SUCCESSED":
-                towing_form[field] = extracted_information[field]
-                fields_processed[field] = "PROCESSED"
+                form = fill_field(form, field, extracted_information[field])
         elif mode == "audio":
             for field, status in validation_status.items():
                 if status == "SUCCESSED":
-                    towing_form[field] = extracted_information.get(field, "")
-                    fields_processed[field] = "PROCESSED"
+                    form = fill_field(form, field, extracted_information.get(field, ""))
         elif mode == "chat":
             field, value = tuple(validation_status.items())[0]
             if value == "SUCCESSED":
-                towing_form[field] = extracted_information[field]
-                fields_processed[field] = "PROCESSED"
-        state["fields_processed"] = fields_processed
-        state["towing_form"] = towing_form
+                form = fill_field(form, field, extracted_information[field])
         logger.info("Towing form updated successfully.")
-        return state
+        return {"form": form} if form is not state["form"] else {}
     except Exception as e:
-        logger.error("Error updating towing form: %e", e)
-        return state
+        logger.error("Error updating towing form: %s", e)
+        return {}
+
+async def windowed_chat_history(state: FRIAgent) -> tuple[list[dict], dict]:
+    """
+    Return the recent chat history to render verbatim, folding older turns into
+    history_summary once the history exceeds CHAT_HISTORY_TOKEN_BUDGET, and the
+    state update recording a new summary (empty if nothing was folded).
+    """
+    history = chat_messages(state["messages"][1:])
+    update = {}
+    summary = state.get("history_summary") or ""
+    summarized = state.get("summarized_messages") or 0
+    to_fold, verbatim = history_window.split(summary, history[summarized:])
+    if to_fold:
+        logger.info("Folding %d messages into the chat history summary.", len(to_fold))
+        try:
+            new_summary = (await complete_template("summarize_chat_history.j2", {
+                "summary": summary,
+                "messages": to_fold
+            })).strip()
+        except Exception as e:
+            logger.error("Error summarizing chat history: %s", e)
+            new_summary = ""
+        if new_summary:
+            summary = new_summary
+            update = {"history_summary": summary, "summarized_messages": summarized + len(to_fold)}
+        else:
+            verbatim = to_fold + verbatim
+    return history_window.fit(summary, verbatim), update
+
+def reached_state_key(state: FRIAgent) -> str | None:
+    """Return the expected-state key this chat turn reached, or None unless its field validated."""
+    validation_status = state.get("validation_status") or {}
+    if state.get("mode") != "chat" or len(validation_status) != 1:
+        return None
+    field, status = next(iter(validation_status.items()))
+    if status != "SUCCESSED":
+        return None
+    return expected_state_key(field, fields_processed(state.get("form")))
+
+async def speculate_question(input_data: dict) -> tuple[str, list[dict]]:
+    """Generate a question in the background, keeping its usage apart from the running turn."""
+    with collect_usage(isolated=True) as records:
+        question = await complete_template("chat_prompt_template.j2", input_data)
+    return question, records
+
+def start_speculation(state: FRIAgent, thread_id: str, input_data: dict, question: str) -> None:
+    """Pre-generate the question that follows question, assuming the user's answer to it validates."""
+    processed = fields_processed(state.get("form"))
+    asked = next((field for field, status in processed.items() if status == "NOT_PROCESSED"), None)
+    if asked is None:
+        return
+    expected_fields = {**processed, asked: "PROCESSED"}
+    speculative_questions.start(thread_id, expected_state_key(asked, expected_fields), speculate_question({
+        **input_data,
+        "user_response": "",
+        "chat_history": input_data["chat_history"] + [{"role": "ai", "content": question}],
+        "validation_result": {asked: "SUCCESSED"},
+        "fields_processed": expected_fields,
+    }))
+
+@timed_node
+async def chat_node(state: FRIAgent, config: RunnableConfig) -> dict:
+    """
+    Ask user about information about incident.
 
-def chat_node(state: FRIAgent) -> FRIAgent:
-    """Ask user about information about incident."""
+    When the run is configured with stream_tokens, the question is streamed token by token
+    on the custom stream (stream_mode="custom") while it is generated.
+    With SPECULATIVE_QUESTIONS_ENABLED, a question pre-generated during the previous turn for
+    the state this turn reached is served without waiting for the LLM, and the question after
+    this one is pre-generated while the user answers.
+    """
     logger.info("Asking user for missing or unclear information.")
     try:
         user_response = state.get("user_response", "")
         validation_status = state.get("validation_status", {})
         print(validation_status)
         mode = state.get("mode", "")
-        fields_processed = state.get("fields_processed", {})
-        prompt = load_template("chat_prompt_template.j2", {
+        chat_history, update = await windowed_chat_history(state)
+        input_data = {
             "mode": mode,
             "user_response": user_response,
-            "chat_history": [{"role": msg.type, "content": msg.content} for msg in state["messages"][1:]],
+            "chat_history": chat_history,
+            "history_summary": update.get("history_summary", state.get("history_summary")),
             "validation_result": validation_status,
-            "fields_processed": fields_processed
-        })
-        response = asyncio.run(llm.get_chat_response([{"role": "user", "content": prompt}]))
-        state["agent_query"] = response
-        state["messages"].append(AIMessage(content=response))
+            "fields_processed": fields_processed(state.get("form"))
+        }
+        stream_tokens = config.get("configurable", {}).get("stream_tokens")
+        thread_id = config.get("configurable", {}).get("thread_id")
+        speculate = settings.SPECULATIVE_QUESTIONS_ENABLED and thread_id is not None
+        speculated = await speculative_questions.take(thread_id, reached_state_key(state)) if speculate else None
+        if speculated:
+            response, records = speculated
+            add_records(records)
+            if stream_tokens:
+                get_stream_writer()({"token": response})
+        elif stream_tokens:
+            response = await stream_template("chat_prompt_template.j2", input_data)
+        else:
+            response = await complete_template("chat_prompt_template.j2", input_data)
+        if speculate and mode == "chat":
+            start_speculation(state, thread_id, input_data, response)
         logger.info("User asked for missing information successfully.")
-        return state
+        return {**update, "agent_query": response, "messages": [("ai", response)]}
     except Exception as e:
-        logger.error("Error asking user: %e", e)
-        return state
+        logger.error("Error asking user: %s", e)
+        return {}
 
-def human_interrupt(state: FRIAgent) -> FRIAgent:
+@timed_node
+def human_interrupt(state: FRIAgent) -> dict:
     """Handle human interrupt."""
     logger.info("Handling human interrupt.")
     user_response = state.get("user_response", "")
     if user_response:
-        state["user_response"] = user_response
-        state["messages"].append(HumanMessage(content=user_response))
-    return state
+        return {"messages": [("human", user_response)]}
+    return {}
 
 def should_go_for_chat_node_after_audio(state: FRIAgent) -> str:
     """Decide if we need to go for chat mode based on validation status for audio mode."""
@@ -294,25 +451,42 @@ def should_go_for_chat_node_after_audio(state: FRIAgent) -> str:
     state["final_audio_validation_status"] = "PASSED"
     return "No"
 
-def emergency_response(state: FRIAgent) -> FRIAgent:
+@timed_node
+def emergency_response(state: FRIAgent) -> dict:
     """Handle emergency response."""
-    logger.info("Routing to emergency response.")
-    state["agent_query"] = "This sounds serious and you may need medical or police help. Please use the emergency button to contact 911 immediately."
+    logger.info("Routing to emergency response (sentiment %s).", state.get("human_sentiment"))
     # Placeholder for emergency response logic
-    return state
+    return {"agent_query": "This sounds serious and you may need medical or police help. Please use the emergency button to contact 911 immediately."}
+
+def route_extraction_strategy(state: FRIAgent) -> str:
+    """Choose fused or separate extraction and validation for a chat turn."""
+    if settings.FUSED_EXTRACT_VALIDATE and state.get("mode") == "chat":
+        return "fused"
+    return "separate"
+
+@timed_node
+def join_audio_analysis(state: FRIAgent) -> dict:
+    """Join the sentiment and extraction branches; drop the extraction if the caller needs emergency help."""
+    if state.get("human_sentiment", "") == "SERIOUS":
+        logger.info("Serious sentiment detected, discarding extracted information.")
+        return {"extracted_information": {}}
+    return {}
 
 def route_based_on_sentiment(state: FRIAgent) -> str:
     """Route based on human sentiment."""
     sentiment = state.get("human_sentiment", "")
     if sentiment == "SERIOUS":
         return "route_to_default_emergency_response"
-    return "get_inputs_for_mode"
+    return "validate_extracted_info"
 
 friagent_builder = StateGraph(FRIAgent)
 friagent_builder.add_node("init_mode", init_mode)
 friagent_builder.add_node("get_inputs_for_mode", get_inputs_for_mode)
 friagent_builder.add_node("extract_info_from_transcription", extract_info_from_transcription)
+friagent_builder.add_node("extract_info_from_audio", extract_info_from_transcription)
+friagent_builder.add_node("join_audio_analysis", join_audio_analysis)
 friagent_builder.add_node("validate_extracted_info", validate_extracted_info)
+friagent_builder.add_node("extract_and_validate_info", extract_and_validate_info)
 friagent_builder.add_node("update_towing_form", update_towing_form)
 friagent_builder.add_node("chat_node", chat_node)
 friagent_builder.add_node("human_interrupt", human_interrupt)
@@ -326,22 +500,24 @@ friagent_builder.add_conditional_edges(
     "init_mode",
     route_to_chat_or_audio,
     {
-        "audio_mode": "detect_human_sentiment",
+        "audio_mode": "get_inputs_for_mode",
         "chat_mode": "human_interrupt",
         "initiate": "chat_node"
     }
 )
+# Audio mode: sentiment and extraction only read the transcription, so they run as parallel branches.
+friagent_builder.add_edge("get_inputs_for_mode", "detect_human_sentiment")
+friagent_builder.add_edge("get_inputs_for_mode", "extract_info_from_audio")
+friagent_builder.add_edge(["detect_human_sentiment", "extract_info_from_audio"], "join_audio_analysis")
 friagent_builder.add_conditional_edges(
-    "detect_human_sentiment",
+    "join_audio_analysis",
     route_based_on_sentiment,
     {
         "route_to_default_emergency_response": "emergency_response",
-        "get_inputs_for_mode": "get_inputs_for_mode"
+        "validate_extracted_info": "validate_extracted_info"
     }
 )
 friagent_builder.add_edge("emergency_response", END)
-friagent_builder.add_edge("get_inputs_for_mode", "extract_info_from_transcription")
-friagent_builder.add_edge("extract_info_from_transcription", "validate_extracted_info")
 friagent_builder.add_edge("validate_extracted_info", "update_towing_form")
 friagent_builder.add_conditional_edges(
     "update_towing_form",
@@ -352,13 +528,34 @@ friagent_builder.add_conditional_edges(
     }
 )
 friagent_builder.add_edge("human_interrupt", "reset_mode")
-friagent_builder.add_edge("reset_mode", "extract_info_from_transcription")
+friagent_builder.add_conditional_edges(
+    "reset_mode",
+    route_extraction_strategy,
+    {
+        "fused": "extract_and_validate_info",
+        "separate": "extract_info_from_transcription"
+    }
+)
+friagent_builder.add_edge("extract_and_validate_info", "update_towing_form")
 friagent_builder.add_edge("extract_info_from_transcription", "validate_extracted_info")
 friagent_builder.add_edge("validate_extracted_info", "update_towing_form")
 friagent_builder.add_edge("update_towing_form", "chat_node")
 friagent_builder.add_edge("chat_node", END)
 
-checkpoint_saver = InMemorySaver()
+def build_checkpoint_saver():
+    """Create the checkpointer selected by CHECKPOINT_BACKEND."""
+    if settings.CHECKPOINT_BACKEND == "memory":
+        logger.warning("Using in-memory checkpoints; sessions are lost on restart and not shared between workers.")
+        return InMemorySaver()
+    return PostgresCheckpointSaver(
+        SQLClient(),
+        max_threads=settings.CHECKPOINT_HOT_MAX_THREADS,
+        max_bytes=settings.CHECKPOINT_HOT_MAX_BYTES,
+        idle_ttl_seconds=settings.CHECKPOINT_IDLE_TTL_SECONDS,
+        verify_hot_reads=settings.CHECKPOINT_VERIFY_HOT_READS,
+    )
+
+checkpoint_saver = build_checkpoint_saver()
 friagent = friagent_builder.compile(checkpointer=checkpoint_saver)
 
 #if __name__ == "__main__":
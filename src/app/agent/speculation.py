@@ -0,0 +1,137 @@
+"""
+Speculative pre-generation of the next chat question.
+
+After chat_node asks for a field, the most likely next turn is that the
+user's answer validates: the field becomes PROCESSED and the agent asks for the
+following one. While the user is typing, the question for that expected state
+is generated in the background. If the next turn's validation matches the
+expected state, chat_node serves the pre-generated question instead of calling
+the LLM; otherwise the speculation is discarded and counted as wasted.
+
+Speculations live in process memory, so with several workers a turn routed to
+another worker simply misses.
+"""
+import time
+import asyncio
+import json
+from dataclasses import dataclass
+from src.app.core.log_config import setup_logging
+from src.app.core.metrics import SPECULATIONS, SPECULATION_WASTED_TOKENS
+
+logger = setup_logging("SPECULATION")
+
+def expected_state_key(field: str, fields_processed: dict) -> str:
+    """Return the key of the state in which field validated and fields_processed is as given."""
+    return json.dumps({"field": field, "fields_processed": fields_processed}, sort_keys=True)
+
+@dataclass
+class Speculation:
+    """A background generation for the expected state of a thread's next turn."""
+    key: str
+    task: asyncio.Task
+    expires_at: float
+
+class SpeculativeQuestions:
+    """
+    Background question generations keyed by thread and expected state.
+
+    :param ttl_seconds: speculations not consumed within this time are discarded.
+    """
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.started = 0
+        self.hits = 0
+        self.wasted = 0
+        self._speculations: dict[str, Speculation] = {}
+
+    def start(self, thread_id: str, key: str, generate) -> None:
+        """
+        Start generating the question for the expected state key of thread_id,
+        replacing the thread's previous speculation.
+
+        :param generate: coroutine producing (question, usage records).
+        """
+        self._expire()
+        self._discard(thread_id, "replaced")
+        self.started += 1
+        task = asyncio.ensure_future(generate)
+        task.add_done_callback(_retrieve_exception)
+        self._speculations[thread_id] = Speculation(key, task, time.monotonic() + self.ttl_seconds)
+
+    async def take(self, thread_id: str, key: str) -> tuple[str, list[dict]] | None:
+        """
+        Return the (question, usage records) speculated for thread_id if it was generated
+        for key, waiting for it if it is still running; None on a miss.
+        """
+        speculation = self._speculations.get(thread_id)
+        if speculation is None:
+            return None
+        if speculation.key != key or speculation.expires_at <= time.monotonic():
+            self._discard(thread_id, "mismatch" if speculation.key != key else "expired")
+            return None
+        del self._speculations[thread_id]
+        try:
+            question, records = await speculation.task
+        except Exception as e:
+            logger.error("Speculative question generation failed: %s", e)
+            self._count_waste("failed", [])
+            return None
+        if not question:
+            self._count_waste("failed", records)
+            return None
+        self.hits += 1
+        SPECULATIONS.labels(result="hit").inc()
+        logger.info("Served speculative question; hit ratio %.1f%%, waste ratio %.1f%%",
+                    100 * self.hit_ratio, 100 * self.waste_ratio)
+        return question, records
+
+    def _discard(self, thread_id: str, reason: str) -> None:
+        """Drop the speculation of thread_id, counting what it spent as wasted."""
+        speculation = self._speculations.pop(thread_id, None)
+        if speculation is None:
+            return
+        task = speculation.task
+        if not task.done():
+            task.cancel()
+            self._count_waste(reason, [])
+        elif task.cancelled() or task.exception() is not None:
+            self._count_waste(reason, [])
+        else:
+            self._count_waste(reason, task.result()[1])
+
+    def _expire(self) -> None:
+        """Discard every speculation past its time to live."""
+        now = time.monotonic()
+        for thread_id in [t for t, s in self._speculations.items() if s.expires_at <= now]:
+            self._discard(thread_id, "expired")
+
+    def _count_waste(self, reason: str, records: list[dict]) -> None:
+        self.wasted += 1
+        SPECULATIONS.labels(result=reason).inc()
+        SPECULATION_WASTED_TOKENS.inc(sum(r["prompt_tokens"] + r["completion_tokens"] for r in records))
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of started speculations that were served."""
+        return self.hits / self.started if self.started else 0.0
+
+    @property
+    def waste_ratio(self) -> float:
+        """Share of started speculations that were discarded."""
+        return self.wasted / self.started if self.started else 0.0
+
+    def stats(self) -> dict:
+        """Return speculation counters and ratios."""
+        return {
+            "pending": len(self._speculations),
+            "started": self.started,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "hit_ratio": self.hit_ratio,
+            "waste_ratio": self.waste_ratio,
+        }
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    """Mark a failed speculation's exception as retrieved; failures only mean a miss."""
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,89 @@
+"""
+Structured JSON output of the extraction and validation prompts.
+
+Each JSON-producing template has a schema; completions are requested in the
+API's structured output mode (LLM_STRUCTURED_OUTPUT) and parsed tolerantly:
+markdown code fences and text around the JSON object are ignored. A reply
+that still does not parse, or lacks a required key, gets one repair request
+quoting the parse error before the caller falls back to its default.
+"""
+import re
+import json
+from src.app.agent.compact_state import FORM_FIELDS
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+def _fields_object(value_schema: dict) -> dict:
+    """Return the schema of an object keyed by form fields; chat turns carry a single field."""
+    return {
+        "type": "object",
+        "properties": {field: value_schema for field in FORM_FIELDS},
+        "additionalProperties": False,
+    }
+
+_EXTRACTED = _fields_object({"type": ["string", "null"]})
+_VALIDATION = _fields_object({"type": "string"})
+
+JSON_SCHEMAS = {
+    "info_extraction_prompt.j2": _EXTRACTED,
+    "validation_agent_prompt.j2": _VALIDATION,
+    "extract_and_validate_prompt.j2": {
+        "type": "object",
+        "properties": {"extracted_information": _EXTRACTED, "validation_status": _VALIDATION},
+        "required": ["extracted_information", "validation_status"],
+        "additionalProperties": False,
+    },
+}
+
+class JSONResponseError(ValueError):
+    """Raised when a completion is not the JSON object its template asks for."""
+
+def response_format(template_name: str, mode: str) -> dict | None:
+    """
+    Return the response_format requesting JSON output for template_name.
+
+    :param mode: "json_schema" (schema-constrained), "json_object" (any JSON object) or "off".
+    """
+    if mode == "off":
+        return None
+    if mode == "json_object" or template_name not in JSON_SCHEMAS:
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": template_name.removesuffix(".j2"),
+            "schema": JSON_SCHEMAS[template_name],
+            "strict": False,
+        },
+    }
+
+def parse_json_response(template_name: str, response: str) -> dict:
+    """
+    Parse the JSON object in a completion, ignoring code fences and surrounding text.
+
+    :raises JSONResponseError: if there is no JSON object or a required key of the template's schema is missing.
+    """
+    fenced = _FENCE.search(response)
+    text = fenced.group(1) if fenced else response
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise JSONResponseError("no JSON object found")
+    try:
+        value = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise JSONResponseError(f"invalid JSON: {e}") from e
+    if not isinstance(value, dict):
+        raise JSONResponseError("the JSON is not an object")
+    missing = [key for key in JSON_SCHEMAS.get(template_name, {}).get("required", []) if key not in value]
+    if missing:
+        raise JSONResponseError(f"missing keys: {', '.join(missing)}")
+    return value
+
+def repair_messages(messages: list[dict], response: str, error: JSONResponseError) -> list[dict]:
+    """Return the conversation asking the model to correct its unparseable reply."""
+    return [
+        *messages,
+        {"role": "assistant", "content": response},
+        {"role": "user", "content": f"Your reply could not be parsed ({error}). "
+                                    "Reply again with only the corrected JSON object, no other text."},
+    ]
@@ -4,6 +4,7 @@ Dependency definitions for FastAPI application.
 from typing import Annotated
 from fastapi import Depends
 from src.app.infrastructure.clients.sql_client import SQLClient
+from src.app.infrastructure.clients.async_sql_client import AsyncSQLClient
 
 def get_sql_client():
     """
@@ -12,3 +13,11 @@ def get_sql_client():
     return SQLClient()
 
 DBClientDep = Annotated[SQLClient, Depends(get_sql_client)]
+
+def get_async_sql_client():
+    """
+    Dependency to get an instance of AsyncSQLClient.
+    """
+    return AsyncSQLClient()
+
+AsyncDBClientDep = Annotated[AsyncSQLClient, Depends(get_async_sql_client)]
@@ -1,7 +1,7 @@
 """Schemas for Fria Agent API endpoints."""
 import uuid
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class AgentInitializeSchema(BaseModel):
     """Schema for initializing the agent."""
@@ -17,3 +17,11 @@ class AgentContinueSchema(BaseModel):
     user_id: uuid.UUID
     user_response: Optional[str] = None
     vehicle_type: Optional[str] = None
+
+class BatchTranscriptSchema(BaseModel):
+    """Schema of one line of a batch transcript upload."""
+    id: Optional[str] = None
+    session_id: uuid.UUID = Field(default_factory=uuid.uuid4)
+    user_id: Optional[uuid.UUID] = None
+    recorded_transcription: str
+    vehicle_type: Optional[str] = None
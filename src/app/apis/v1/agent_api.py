@@ -1,9 +1,18 @@
 """Agent API Endpoints for FRIA Agent Initialization and Interaction."""
-from fastapi import APIRouter, HTTPException
-from src.app.services.agent_service import (initialize_agent, agent_continue)
-from src.app.apis.deps import DBClientDep
+import json
+import uuid
+import codecs
+import asyncio
+from typing import AsyncIterator
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from src.app.services.agent_service import (initialize_agent, agent_continue, agent_continue_stream)
+from src.app.services.batch_service import run_batch
+from src.app.services.llm_usage_service import fetch_usage_by_session_id, fetch_usage_summary
+from src.app.apis.deps import AsyncDBClientDep
 from src.app.apis.schemas.fria_agent_schema import AgentInitializeSchema, AgentContinueSchema
-
+from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
 
 logger = setup_logging("AGENT API")
@@ -11,23 +20,98 @@ logger = setup_logging("AGENT API")
 router = APIRouter(prefix="/agent", tags=["Agent Endpoints"])
 
 @router.post("/initialize", summary="Initialize FRIA Agent")
-def api_initialize_agent(agent_initialize_data: AgentInitializeSchema, db_client: DBClientDep):
+async def api_initialize_agent(agent_initialize_data: AgentInitializeSchema, db_client: AsyncDBClientDep):
     """
     Endpoint to initialize the FRIA agent for a specific user.
     """
-    response = initialize_agent(db_client, agent_initialize_data=agent_initialize_data)
+    response = await initialize_agent(db_client, agent_initialize_data=agent_initialize_data)
     if response["status"] == "error":
         logger.error("Failed to initialize agent: %s", response["message"])
         raise HTTPException(status_code=500, detail=response["message"])
     return {"status_code": 200, "data": response}
 
 @router.post("/continue", summary="Continue FRIA Agent Interaction")
-def api_continue_agent_interaction(agent_continue_data: AgentContinueSchema, db_client: DBClientDep):
+async def api_continue_agent_interaction(agent_continue_data: AgentContinueSchema, db_client: AsyncDBClientDep):
     """
     Endpoint to continue the FRIA agent interaction.
     """
-    response = agent_continue(db_client, agent_continue_data=agent_continue_data)
+    response = await agent_continue(db_client, agent_continue_data=agent_continue_data)
     if response["status"] == "error":
         logger.error("Failed to continue agent interaction: %s", response["message"])
         raise HTTPException(status_code=500, detail=response["message"])
     return {"status_code": 200, "data": response}
+
+@router.post("/continue/stream", summary="Continue FRIA Agent Interaction with streamed question")
+async def api_continue_agent_interaction_stream(agent_continue_data: AgentContinueSchema, db_client: AsyncDBClientDep):
+    """
+    Endpoint to continue the FRIA agent interaction, streaming the next question as server-sent events.
+    Emits "token" events while the question is generated, then a single "done" (or "error") event
+    carrying the same payload as /agent/continue.
+    """
+    async def event_stream():
+        async for event, data in agent_continue_stream(db_client, agent_continue_data=agent_continue_data):
+            if event == "error":
+                logger.error("Failed to stream agent interaction: %s", data["message"])
+            yield f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/batch", summary="Run recorded transcripts through the FRIA Agent")
+async def api_batch_transcripts(request: Request, db_client: AsyncDBClientDep,
+                                concurrency: int = Query(settings.BATCH_MAX_CONCURRENCY, ge=1,
+                                                         le=settings.BATCH_MAX_CONCURRENCY)):
+    """
+    Endpoint running a JSONL upload of recorded transcripts through the audio branch of the agent.
+    The request body holds one BatchTranscriptSchema object per line. Results are streamed back
+    as NDJSON, one line per transcript as soon as it finishes; a failing line yields an error
+    result and does not affect the others.
+    """
+    received = asyncio.Event()
+    results = run_batch(db_client, _body_lines(request, received), concurrency)
+    # The response cannot start before the upload is read: the server's disconnect listener would
+    # take the remaining body chunks. Transcripts start as their lines arrive; results finished
+    # during the upload are sent first.
+    early = []
+    async for result in results:
+        early.append(result)
+        if received.is_set():
+            break
+
+    async def result_stream():
+        for result in early:
+            yield json.dumps(jsonable_encoder(result)) + "\n"
+        async for result in results:
+            yield json.dumps(jsonable_encoder(result)) + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+async def _body_lines(request: Request, received: asyncio.Event) -> AsyncIterator[str]:
+    """Yield the lines of the request body as its chunks arrive and set received once it is read."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    partial = ""
+    async for chunk in request.stream():
+        *lines, partial = (partial + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line
+    received.set()
+    partial += decoder.decode(b"", final=True)
+    if partial:
+        yield partial
+
+@router.get("/usage", summary="Aggregate LLM token spend")
+async def api_usage_summary(db_client: AsyncDBClientDep, top_sessions: int = 10):
+    """
+    Endpoint returning the LLM token spend over all sessions, per prompt template and for the most expensive sessions.
+    """
+    return {"status_code": 200, "data": await fetch_usage_summary(db_client, top_sessions=top_sessions)}
+
+@router.get("/usage/{session_id}", summary="LLM token spend of a session")
+async def api_session_usage(session_id: uuid.UUID, db_client: AsyncDBClientDep):
+    """
+    Endpoint returning the LLM token spend of a session, in total and per graph node and prompt template.
+    """
+    return {"status_code": 200, "data": await fetch_usage_by_session_id(db_client, str(session_id))}
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, HTTPException
 from src.app.apis.schemas.location_routers_schema import (ForwardSearchRequest, InsertGPSLocationRequest)
 from src.app.services.gps_location_service import insert_gps_location
-from src.app.apis.deps import DBClientDep
+from src.app.apis.deps import AsyncDBClientDep
 from src.app.services.gps_location_service import (search_address,auto_detect_location)
 
 router = APIRouter(prefix="/location", tags=["Location Endpoints"])
@@ -22,9 +22,9 @@ def api_auto_detect_location():
     return {"status_code": 200, "address" : location}
 
 @router.post("/insert-gps-location", description="Insert GPS location into the database.")
-def api_insert_gps_location(payload: InsertGPSLocationRequest, db_client: DBClientDep):
+async def api_insert_gps_location(payload: InsertGPSLocationRequest, db_client: AsyncDBClientDep):
     """Insert GPS location into the database."""
-    is_insert_success = insert_gps_location(gps_location_request=payload,db_client=db_client)
+    is_insert_success = await insert_gps_location(gps_location_request=payload,db_client=db_client)
     if not is_insert_success.get("insert_success"):
         raise HTTPException(status_code=500, detail="Failed to insert GPS location.")
     return {"status_code": 200, "message": is_insert_success["message"]}
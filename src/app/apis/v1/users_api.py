@@ -1,26 +1,31 @@
 """User and System related API endpoints."""
-from fastapi import APIRouter, HTTPException
+import json
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
 from src.app.services.user_service import (
 fetch_user_by_name,
 fetch_insurance_details_by_vehicle_id,
 fetch_session_id_by_user_vechicle_id,
 create_session_id,
-fetch_vehicle_by_user_id)
-from src.app.services.messages import fetch_messages_by_session_id
+fetch_vehicle_by_user_id,
+bootstrap_session)
+from src.app.services.messages import InvalidCursorError, decode_cursor, fetch_messages_page, stream_messages
 from src.app.apis.schemas.user_system_schema import CreateSessionSchema
-from src.app.apis.deps import DBClientDep
+from src.app.apis.deps import AsyncDBClientDep
 
 logger = setup_logging("USERS & SYSTEM API")
 
 router = APIRouter(prefix="/users_system", tags=["User & System endpoints"])
 
 @router.get("/get_user_details/{user_name}", summary="Get User Details")
-def get_user_details(user_name: str, db_client: DBClientDep) -> dict:
+async def get_user_details(user_name: str, db_client: AsyncDBClientDep) -> dict:
     """
     Endpoint to get user details by user name.
     """
-    user_info = fetch_user_by_name(db_client, user_name)
+    user_info = await fetch_user_by_name(db_client, user_name)
     if not user_info:
         logger.error("User %s not found.", user_name)
         raise HTTPException(status_code=404, detail="User not found")
@@ -28,11 +33,11 @@ def get_user_details(user_name: str, db_client: DBClientDep) -> dict:
     return {"status_code": 200, "user_info": user_info}
 
 @router.get("/get_vehicle_details/{user_id}", summary="Get Vehicle Details")
-def get_vehicle_details(user_id: str, db_client: DBClientDep) -> dict:
+async def get_vehicle_details(user_id: str, db_client: AsyncDBClientDep) -> dict:
     """
     Endpoint to get vehicle details by user ID.
     """
-    vehicle_info = fetch_vehicle_by_user_id(db_client, user_id)
+    vehicle_info = await fetch_vehicle_by_user_id(db_client, user_id)
     if not vehicle_info:
         logger.error("Vehicle for user ID %s not found.", user_id)
         raise HTTPException(status_code=404, detail="Vehicle not found")
@@ -40,23 +45,41 @@ def get_vehicle_details(user_id: str, db_client: DBClientDep) -> dict:
     return {"status_code": 200, "vehicle_info": vehicle_info}
 
 @router.get("/get_insurance_by_vehicle/{vehicle_id}", summary="Get Insurance Details by Vehicle ID")
-def get_insurance_by_vehicle(vehicle_id: str, db_client: DBClientDep) -> dict:
+async def get_insurance_by_vehicle(vehicle_id: str, db_client: AsyncDBClientDep) -> dict:
     """
     Endpoint to get insurance details by vehicle ID.
     """
-    insurance_info = fetch_insurance_details_by_vehicle_id(db_client, vehicle_id)
+    insurance_info = await fetch_insurance_details_by_vehicle_id(db_client, vehicle_id)
     if not insurance_info:
         logger.error("Insurance details for vehicle ID %s not found.", vehicle_id)
         raise HTTPException(status_code=404, detail="Insurance details not found")
     logger.info("Insurance details for vehicle ID %s retrieved successfully.", vehicle_id)
     return {"status_code": 200, "insurance_info": insurance_info}
 
+@router.get("/bootstrap/{user_name}", summary="Bootstrap Session")
+async def bootstrap(user_name: str, db_client: AsyncDBClientDep, vehicle_id: str | None = None) -> dict:
+    """
+    Endpoint to get user details, their vehicles with insurance details and the latest session
+    of the vehicle (the first one unless vehicle_id is given), creating the session if there is none.
+    Replaces calling get_user_details, get_vehicle_details, get_insurance_by_vehicle and
+    get_session_id/create_session in turn.
+    """
+    payload = await bootstrap_session(db_client, user_name, vehicle_id)
+    if payload is None:
+        logger.error("User %s not found.", user_name)
+        raise HTTPException(status_code=404, detail="User not found")
+    if vehicle_id and payload["vehicle_id"] is None:
+        logger.error("Vehicle %s of user %s not found.", vehicle_id, user_name)
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    logger.info("Bootstrapped session %s for user %s.", payload["session_id"], user_name)
+    return {"status_code": 200, **payload}
+
 @router.post("/create_session", summary="Create Session")
-def create_session(session_data: CreateSessionSchema, db_client: DBClientDep) -> dict:
+async def create_session(session_data: CreateSessionSchema, db_client: AsyncDBClientDep) -> dict:
     """
     Endpoint to create a new session for a user and vehicle.
     """
-    session_id = create_session_id(db_client, session_data.user_id, session_data.vehicle_id, session_data.user_name)
+    session_id = await create_session_id(db_client, session_data.user_id, session_data.vehicle_id, session_data.user_name)
     if not session_id:
         logger.error("Failed to create session.")
         raise HTTPException(status_code=500, detail="Failed to create session")
@@ -64,21 +87,42 @@ def create_session(session_data: CreateSessionSchema, db_client: DBClientDep) ->
     return {"status_code": 200, "session_id": session_id}
 
 @router.get("/get_session_id/{user_id}/{vehicle_id}", summary="Get Session ID")
-def get_user_session_id(user_id: str, vehicle_id: str, db_client: DBClientDep) -> dict:
+async def get_user_session_id(user_id: str, vehicle_id: str, db_client: AsyncDBClientDep) -> dict:
     """
     Helper function to get session ID by user ID and vehicle ID.
     """
-    session_id = fetch_session_id_by_user_vechicle_id(db_client, user_id, vehicle_id)
+    session_id = await fetch_session_id_by_user_vechicle_id(db_client, user_id, vehicle_id)
     return {"status_code": 200, "session_id": session_id}
 
 @router.get("/get_messages/{session_id}", summary="Get Messages by Session ID")
-def get_messages(session_id: str, db_client: DBClientDep) -> dict:
+async def get_messages(session_id: str, db_client: AsyncDBClientDep,
+                       limit: int = Query(settings.MESSAGES_PAGE_DEFAULT_LIMIT, ge=1, le=settings.MESSAGES_PAGE_MAX_LIMIT),
+                       after: str | None = None) -> dict:
     """
-    Endpoint to get messages by session ID.
+    Endpoint to get a page of messages by session ID, oldest first. Pass next_cursor as after
+    to get the next page, or later to get the messages added since.
     """
-    messages = fetch_messages_by_session_id(db_client, session_id)
-    if messages is None:
-        logger.error("No messages found for session ID %s.", session_id)
-        raise HTTPException(status_code=404, detail="No messages found for this session")
+    try:
+        page = await fetch_messages_page(db_client, session_id, limit, after)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     logger.info("Messages for session ID %s retrieved successfully.", session_id)
-    return {"status_code": 200, "messages": messages}
+    return {"status_code": 200, **page}
+
+@router.get("/get_messages/{session_id}/stream", summary="Stream Messages by Session ID")
+async def stream_session_messages(session_id: str, db_client: AsyncDBClientDep, after: str | None = None):
+    """
+    Endpoint streaming every message of a session (after the cursor, if given) as NDJSON,
+    one message with its cursor per line, oldest first.
+    """
+    if after:
+        try:
+            decode_cursor(after)  # reject a bad cursor before the response starts
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    async def message_stream():
+        async for message in stream_messages(db_client, session_id, settings.DB_STREAM_BATCH_SIZE, after):
+            yield json.dumps(jsonable_encoder(message)) + "\n"
+
+    return StreamingResponse(message_stream(), media_type="application/x-ndjson")
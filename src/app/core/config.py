@@ -1,7 +1,7 @@
 """
 Settings environment variables using pydantic-settings for configuration management.
 """
-from typing import Optional
+from typing import Literal, Optional, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -19,6 +19,64 @@ class Settings(BaseSettings):
     DEPLOYMENT_NAME: Optional[str] = None
     MODEL_NAME: Optional[str] = None
 
+    # LLM admission control (size the rate limits to the deployment quota; 0 = unlimited)
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_REQUESTS_PER_MINUTE: int = 0
+    LLM_TOKENS_PER_MINUTE: int = 0
+    LLM_COMPLETION_TOKEN_RESERVE: int = 500
+    LLM_MAX_RETRIES: int = 4
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 20.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 30.0
+    LLM_SINGLE_FLIGHT_ENABLED: bool = True  # identical concurrent prompts share one request
+
+    # Structured output of the extraction/validation prompts: "json_schema", "json_object" or "off"
+    LLM_STRUCTURED_OUTPUT: Literal["json_schema", "json_object", "off"] = "json_schema"
+
+    # Tiered model routing: the listed templates go to a smaller, faster deployment when one is set
+    LLM_FAST_DEPLOYMENT_NAME: Optional[str] = None  # model name when not using Azure
+    LLM_FAST_TEMPLATES: List[str] = ["analyse_user_sentiment.j2", "validation_agent_prompt.j2"]
+    LLM_FAST_MAX_CONCURRENCY: int = 16
+    LLM_FAST_REQUESTS_PER_MINUTE: int = 0
+    LLM_FAST_TOKENS_PER_MINUTE: int = 0
+
+    # LLM pricing used by the usage endpoints (per 1K tokens, in your billing currency)
+    LLM_PROMPT_COST_PER_1K_TOKENS: float = 0.0
+    LLM_COMPLETION_COST_PER_1K_TOKENS: float = 0.0
+
+    # LLM response cache (only the listed prompt templates are cached)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TEMPLATES: List[str] = [
+        "info_extraction_prompt.j2",
+        "validation_agent_prompt.j2",
+        "extract_and_validate_prompt.j2",
+        "analyse_user_sentiment.j2",
+    ]
+    LLM_CACHE_MAX_ENTRIES: int = 2048
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    LLM_CACHE_DISK_PATH: Optional[str] = None
+
+    # Message history pages (/users_system/get_messages); the NDJSON stream reads pages of the max size
+    MESSAGES_PAGE_DEFAULT_LIMIT: int = 100
+    MESSAGES_PAGE_MAX_LIMIT: int = 500
+
+    # Read-through cache of the user, vehicle and insurance profile lookups (per worker)
+    PROFILE_CACHE_ENABLED: bool = True
+    PROFILE_CACHE_MAX_ENTRIES: int = 10000  # per lookup function
+    PROFILE_CACHE_TTL_SECONDS: int = 300
+    PROFILE_CACHE_NEGATIVE_TTL_SECONDS: int = 30  # lookups that found no row
+
+    # Agent graph
+    FUSED_EXTRACT_VALIDATE: bool = False  # one LLM call for extraction + validation on chat turns
+    FAST_PATH_ENABLED: bool = True  # answer trivial chat replies ("yes", "dead", ...) without the LLM
+    FAST_PATH_MIN_CONFIDENCE: float = 0.8
+    CHAT_HISTORY_TOKEN_BUDGET: int = 1000  # summary + verbatim turns rendered into the chat prompt
+    CHAT_HISTORY_KEEP_TURNS: int = 2  # recent agent/user turns kept verbatim once over budget
+    SPECULATIVE_QUESTIONS_ENABLED: bool = False  # pre-generate the next question while the user answers
+    SPECULATION_TTL_SECONDS: float = 600
+    BATCH_MAX_CONCURRENCY: int = 16  # transcripts of a batch processed at the same time
+    TOKENIZER_ENCODING: str = "o200k_base"
+
     # Azure Speech
     AZURE_SPEECH_KEY: Optional[str] = None
     AZURE_SPEECH_REGION: Optional[str] = None
@@ -28,8 +86,30 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: Optional[str] = None
+    ASYNC_DATABASE_URL: Optional[str] = None  # defaults to DATABASE_URL with the asyncpg driver
+    # Connection pool of each engine (sync and async) in each worker
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = True  # False relies on DB_POOL_RECYCLE_SECONDS for liveness, saving a round trip per checkout
+    DB_STREAM_BATCH_SIZE: int = 1000  # rows per fetch of the server-side cursors of stream/iter_batches
+
+    # Write-behind buffer for chat messages and audio transcripts
+    WRITE_BEHIND_ENABLED: bool = True
+    WRITE_BEHIND_BATCH_SIZE: int = 100  # flush as soon as this many rows are pending
+    WRITE_BEHIND_FLUSH_INTERVAL_SECONDS: float = 0.2
+    WRITE_BEHIND_MAX_PENDING: int = 5000  # writers wait when this many rows are pending
     MONGODB_URI: Optional[str] = None
 
+    # Agent checkpoints ("postgres" or "memory")
+    CHECKPOINT_BACKEND: str = "postgres"
+    CHECKPOINT_HOT_MAX_THREADS: int = 500
+    CHECKPOINT_HOT_MAX_BYTES: int = 64 * 1024 * 1024
+    CHECKPOINT_IDLE_TTL_SECONDS: int = 1800
+    CHECKPOINT_VERIFY_HOT_READS: bool = True
+    CHECKPOINT_DURABILITY: Literal["exit", "async", "sync"] = "exit"  # "exit": one checkpoint per turn
+
     # Existing .env keys (these were causing the crash)
     backend_url: Optional[str] = None
     mcp_url: Optional[str] = None
@@ -1,20 +1,53 @@
 """
 Database utility module for setting up SQLAlchemy engine and session.
+
+Both the sync engine (SQLClient, checkpoints) and the async engine
+(AsyncSQLClient) are sized by the DB_POOL_* settings and report their pool
+usage through the fria_db_pool_* metrics.
 """
 from fastapi import Request
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.pool import Pool
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 from src.app.core.config import settings
+from src.app.core.metrics import DB_POOL_IN_USE, DB_POOL_OVERFLOW, DB_POOL_CONNECTS
 
 DATABASE_URL = settings.DATABASE_URL
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in the configuration.")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True
-)
+POOL_OPTIONS = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+def observe_pool(pool: Pool, name: str) -> None:
+    """
+    Report the in-use and overflow connections of pool, and the connections it opens,
+    labelled with the engine name. Checkout wait is observed by the SQL clients.
+    """
+    DB_POOL_IN_USE.labels(engine=name).set_function(pool.checkedout)
+    DB_POOL_OVERFLOW.labels(engine=name).set_function(lambda: max(pool.overflow(), 0))
+    connects = DB_POOL_CONNECTS.labels(engine=name)
+    event.listen(pool, "connect", lambda *_: connects.inc())
+
+engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
+observe_pool(engine.pool, "sync")
+
+def async_database_url(url: str) -> str:
+    """Return url with its PostgreSQL driver replaced by asyncpg."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return url
+    return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL), **POOL_OPTIONS)
+observe_pool(async_engine.sync_engine.pool, "async")
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
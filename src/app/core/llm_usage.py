@@ -0,0 +1,52 @@
+"""
+Per-call LLM token usage.
+
+AzureOpenAIClient reports the usage of every completion with record_usage.
+Records are delivered to every collect_usage() block active in the calling
+context: the agent service collects a turn's records to persist them in the
+llm_usage table. Records are not kept in the agent state, so they do not grow
+the checkpoints.
+"""
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from src.app.core.metrics import current_node
+
+_collectors: ContextVar[tuple[list, ...]] = ContextVar("llm_usage_collectors", default=())
+
+@contextmanager
+def collect_usage(isolated: bool = False):
+    """
+    Collect the usage records of the LLM calls made inside the with-block (including child tasks).
+
+    :param isolated: deliver the records to this block only, not to the enclosing collectors.
+    """
+    records = []
+    token = _collectors.set((records,) if isolated else _collectors.get() + (records,))
+    try:
+        yield records
+    finally:
+        _collectors.reset(token)
+
+def record_usage(template_name: str | None, prompt_tokens: int, completion_tokens: int,
+                 latency_ms: int, cached: bool = False) -> None:
+    """Report the usage of one LLM call to the active collectors."""
+    collectors = _collectors.get()
+    if not collectors:
+        return
+    record = {
+        "id": str(uuid.uuid4()),
+        "node": current_node(),
+        "template": template_name,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_ms": latency_ms,
+        "cached": cached,
+    }
+    for records in collectors:
+        records.append(record)
+
+def add_records(records: list[dict]) -> None:
+    """Deliver records collected elsewhere (e.g. in a background task) to the active collectors."""
+    for collected in _collectors.get():
+        collected.extend(records)
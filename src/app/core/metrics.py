@@ -0,0 +1,96 @@
+"""
+Prometheus metrics of the FRIA backend, exposed on /metrics.
+
+Histograms time every graph node, LLM request, SQLClient/AsyncSQLClient call and checkpoint
+operation; token counts come from the usage reported by Azure OpenAI.
+Metrics are per process: scrape every worker, or run with
+PROMETHEUS_MULTIPROC_DIR set when serving with several workers.
+"""
+import time
+import inspect
+import functools
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram
+from langgraph.config import get_config
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+GRAPH_NODE_SECONDS = Histogram(
+    "fria_graph_node_seconds", "Time spent in a FRIA agent graph node.", ["node"], buckets=LATENCY_BUCKETS)
+LLM_REQUEST_SECONDS = Histogram(
+    "fria_llm_request_seconds", "Time of an LLM completion including admission wait and retries.",
+    ["tier", "template", "outcome"], buckets=LATENCY_BUCKETS)
+LLM_TOKENS = Histogram(
+    "fria_llm_tokens", "Tokens per LLM completion as reported by the API.", ["template", "kind"], buckets=TOKEN_BUCKETS)
+LLM_CACHE_LOOKUPS = Counter(
+    "fria_llm_cache_lookups_total", "LLM response cache lookups.", ["template", "result"])
+LLM_ADMISSION_WAIT_SECONDS = Histogram(
+    "fria_llm_admission_wait_seconds", "Time an LLM request waited for a concurrency slot and rate budget.",
+    ["tier"], buckets=LATENCY_BUCKETS)
+LLM_QUEUE_DEPTH = Gauge("fria_llm_queue_depth", "LLM requests waiting for admission.", ["tier"])
+LLM_IN_FLIGHT = Gauge("fria_llm_in_flight", "LLM requests in flight.", ["tier"])
+LLM_RETRIES = Counter("fria_llm_retries_total", "LLM request retries.", ["tier", "reason"])
+LLM_COALESCED = Counter(
+    "fria_llm_coalesced_requests_total", "LLM requests that waited for an identical in-flight request.", ["template"])
+SPECULATIONS = Counter(
+    "fria_speculations_total", "Speculative next-question generations by outcome.", ["result"])
+SPECULATION_WASTED_TOKENS = Counter(
+    "fria_speculation_wasted_tokens_total", "Tokens spent on speculative questions that were discarded.")
+LLM_JSON_PARSE_FAILURES = Counter(
+    "fria_llm_json_parse_failures_total", "LLM replies that were not the expected JSON object.", ["template", "attempt"])
+PROFILE_CACHE_LOOKUPS = Counter(
+    "fria_profile_cache_lookups_total", "User, vehicle and insurance profile cache lookups.", ["lookup", "result"])
+FAST_PATH_LOOKUPS = Counter("fria_fast_path_lookups_total", "Rule-based extractor lookups.", ["result"])
+SQL_SECONDS = Histogram("fria_sql_seconds", "Time of a SQLClient or AsyncSQLClient call.", ["method"], buckets=LATENCY_BUCKETS)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "fria_db_pool_checkout_seconds", "Time to get a connection from the pool.", ["engine"], buckets=LATENCY_BUCKETS)
+DB_POOL_IN_USE = Gauge("fria_db_pool_in_use", "Connections checked out of the pool.", ["engine"])
+DB_POOL_OVERFLOW = Gauge("fria_db_pool_overflow", "Connections open beyond the pool size.", ["engine"])
+DB_POOL_CONNECTS = Counter("fria_db_pool_connects_total", "New database connections opened by the pool.", ["engine"])
+WRITE_BEHIND_PENDING = Gauge("fria_write_behind_pending_rows", "Rows waiting in the write-behind buffer.")
+WRITE_BEHIND_ROWS = Counter("fria_write_behind_rows_total", "Write-behind rows by flush outcome.", ["result"])
+WRITE_BEHIND_WAIT_SECONDS = Histogram(
+    "fria_write_behind_wait_seconds", "Time a writer waited for space in the full write-behind buffer.",
+    buckets=LATENCY_BUCKETS)
+CHECKPOINT_SECONDS = Histogram(
+    "fria_checkpoint_seconds", "Time of a checkpointer operation.", ["operation"], buckets=LATENCY_BUCKETS)
+
+@contextmanager
+def timer(histogram: Histogram, **labels):
+    """Observe the duration of the with-block in histogram."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - started)
+
+def _instrument(func, histogram: Histogram, labels):
+    """Wrap a sync or async function so that each call is timed with the labels returned by labels()."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with timer(histogram, **labels()):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timer(histogram, **labels()):
+            return func(*args, **kwargs)
+    return wrapper
+
+def timed(histogram: Histogram, **labels):
+    """Decorator observing the duration of every call of a sync or async function."""
+    return lambda func: _instrument(func, histogram, lambda: labels)
+
+def current_node() -> str:
+    """Return the name of the graph node running in this context, or "unknown" outside a graph run."""
+    try:
+        return get_config()["metadata"].get("langgraph_node", "unknown")
+    except RuntimeError:
+        return "unknown"
+
+def timed_node(func):
+    """Decorator for graph node functions, labelled with the node name they run as."""
+    return _instrument(func, GRAPH_NODE_SECONDS, lambda: {"node": current_node()})
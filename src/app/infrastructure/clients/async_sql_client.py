@@ -0,0 +1,170 @@
+"""Async SQL Client for executing raw SQL queries using the SQLAlchemy asyncio engine."""
+import time
+import datetime
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from src.app.core.config import settings
+from src.app.core.log_config import setup_logging
+from src.app.core.database import async_engine
+from src.app.core.metrics import SQL_SECONDS, DB_POOL_CHECKOUT_SECONDS, timer, timed
+from src.app.infrastructure.clients.sql_client import first_row
+
+logger = setup_logging("Async SQL Client")
+
+def _bind_value(value):
+    """
+    Return value as asyncpg can bind it to the model's TIMESTAMP WITHOUT TIME ZONE columns:
+    asyncpg rejects aware datetimes there, which psycopg2 converts server side.
+    """
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+def _bind(values: dict | list[dict] | None) -> dict | list[dict]:
+    """Return query parameters with every value passed through _bind_value."""
+    if isinstance(values, list):
+        return [_bind(row) for row in values]
+    return {key: _bind_value(value) for key, value in (values or {}).items()}
+
+class AsyncUnitOfWork:
+    """
+    Runs several statements on one connection and in one transaction, with the query
+    methods of AsyncSQLClient. Obtained from AsyncSQLClient.unit_of_work().
+    """
+    def __init__(self, connection: AsyncConnection):
+        self.connection = connection
+
+    async def insert(self, query: str, values: dict | list[dict] = None) -> dict:
+        """Execute an INSERT query with one dict or a list of dicts of values."""
+        await self.connection.execute(text(query), _bind(values))
+        if isinstance(values, list):
+            logger.info("[Insert] (Batch) Inserted %d records.", len(values))
+        else:
+            logger.info("[Insert] Inserted single record.")
+        return {"status": "success"}
+
+    async def insert_returning_id(self, query: str, values: dict = None):
+        """Execute an INSERT ... RETURNING id query and return the inserted record's ID."""
+        result = await self.connection.execute(text(query), _bind(values))
+        inserted_id = result.scalar_one_or_none()
+        logger.info("[Insert Returning ID] Inserted record with ID: %s", inserted_id)
+        return inserted_id
+
+    async def fetch_all(self, query: str, params: dict = None, as_dict: bool = True) -> list:
+        """
+        Execute a SELECT query and return all results, as SQLClient.fetch_all does:
+        {first column: second column} dictionaries, or the rows if not as_dict.
+        """
+        result = await self.connection.execute(text(query), _bind(params))
+        rows = result.fetchall()
+        logger.info("[Fetch All] Retrieved %d records.", len(rows))
+        if as_dict:
+            return [{row[0]: row[1]} for row in rows]
+        return rows
+
+    async def fetch_one(self, query: str, params: dict = None, as_dict: bool = True):
+        """Execute a SELECT query and return the first row as a dictionary (or row if not as_dict), or None."""
+        return first_row(await self.connection.execute(text(query), _bind(params)), as_dict)
+
+class AsyncSQLClient:
+    """
+    Async counterpart of SQLClient with the same query methods, run on the asyncpg driver
+    so that routes do not need the threadpool for database access.
+
+    Every query method runs in its own transaction; use unit_of_work() to run
+    several statements of one request on a single connection and transaction.
+    """
+    def __init__(self):
+        self.engine = async_engine
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Async context manager to get a database connection.
+        Sets up a transactional DB connection.
+        """
+        with timer(SQL_SECONDS, method="async_session"):
+            started = time.perf_counter()
+            async with self.engine.connect() as connection:
+                DB_POOL_CHECKOUT_SECONDS.labels(engine="async").observe(time.perf_counter() - started)
+                try:
+                    async with connection.begin():
+                        yield connection
+                except SQLAlchemyError as e:
+                    logger.error("[Async Session] Error during session: %s", e)
+                    raise
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator[AsyncUnitOfWork]:
+        """
+        Async context manager running every statement of the with-block on one connection,
+        committed together when the block exits and rolled back if it raises.
+        """
+        async with self.session() as connection:
+            yield AsyncUnitOfWork(connection)
+
+    @timed(SQL_SECONDS, method="async_insert")
+    async def insert(self, query: str, values: dict | list[dict] = None):
+        """Execute an INSERT query with one dict or a list of dicts of values."""
+        try:
+            async with self.unit_of_work() as uow:
+                return await uow.insert(query, values)
+        except SQLAlchemyError as e:
+            logger.error("[Insert] Insert failed: %s", e)
+            raise
+
+    @timed(SQL_SECONDS, method="async_insert_returning_id")
+    async def insert_returning_id(self, query: str, values: dict = None):
+        """Execute an INSERT ... RETURNING id query and return the inserted record's ID."""
+        try:
+            async with self.unit_of_work() as uow:
+                return await uow.insert_returning_id(query, values)
+        except SQLAlchemyError as e:
+            logger.error("[Insert Returning ID] Insert failed: %s", e)
+            raise
+
+    @timed(SQL_SECONDS, method="async_fetch_all")
+    async def fetch_all(self, query: str, params: dict = None, as_dict: bool = True):
+        """Execute a SELECT query and return all results, see AsyncUnitOfWork.fetch_all."""
+        try:
+            async with self.unit_of_work() as uow:
+                return await uow.fetch_all(query, params, as_dict)
+        except SQLAlchemyError as e:
+            logger.error("[Fetch All] Query failed: %s", e)
+            raise
+
+    async def iter_batches(self, query: str, params: dict = None, batch_size: int = None) -> AsyncIterator[list[dict]]:
+        """
+        Async counterpart of SQLClient.iter_batches: yield the rows of a SELECT query, read
+        through a server-side cursor, as lists of up to batch_size (DB_STREAM_BATCH_SIZE) dictionaries.
+        """
+        count = 0
+        try:
+            async with self.session() as connection:
+                result = await connection.stream(text(query), _bind(params))
+                async for partition in result.mappings().partitions(batch_size or settings.DB_STREAM_BATCH_SIZE):
+                    count += len(partition)
+                    yield [dict(row) for row in partition]
+        except SQLAlchemyError as e:
+            logger.error("[Async Stream] Streamed query failed: %s", e)
+            raise
+        logger.info("[Async Stream] Yielded %d records.", count)
+
+    async def stream(self, query: str, params: dict = None, batch_size: int = None) -> AsyncIterator[dict]:
+        """Yield the rows of a SELECT query one dictionary at a time, see iter_batches."""
+        async for batch in self.iter_batches(query, params, batch_size):
+            for row in batch:
+                yield row
+
+    @timed(SQL_SECONDS, method="async_fetch_one")
+    async def fetch_one(self, query: str, params: dict = None, as_dict: bool = True):
+        """Execute a SELECT query and return the first row as a dictionary (or row if not as_dict), or None."""
+        try:
+            async with self.unit_of_work() as uow:
+                return await uow.fetch_one(query, params, as_dict)
+        except SQLAlchemyError as e:
+            logger.error("[Fetch One] Query failed: %s", e)
+            raise
@@ -1,39 +1,233 @@
 """Azure OpenAI Client Implementation"""
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable
 import openai
 from openai import AsyncAzureOpenAI, AsyncOpenAI
 from src.app.core.log_config import setup_logging
 from src.app.core.config import settings   # ← FIXED import
+from src.app.core.metrics import LLM_REQUEST_SECONDS, LLM_TOKENS, LLM_COALESCED
+from src.app.core.llm_usage import record_usage
+from src.app.infrastructure.clients.llm_response_cache import LLMResponseCache, cache_key
+from src.app.infrastructure.clients.llm_admission import (AdmissionController, AdmissionLimits, LLMUnavailableError,
+                                                          RetryPolicy)
+from src.app.infrastructure.clients.single_flight import SingleFlight
 
 logger = setup_logging("AzureOpenAIClient")
+
+def _is_valid(validate: Callable[[str], Any] | None, message: str) -> bool:
+    """Return False if validate rejects message with a ValueError."""
+    try:
+        if validate:
+            validate(message)
+    except ValueError:
+        return False
+    return True
+
+@dataclass
+class LLMTier:
+    """A model deployment with its own connection pool and admission control."""
+    name: str
+    model: str
+    client: AsyncOpenAI
+    admission: AdmissionController
+
 class AzureOpenAIClient(AsyncAzureOpenAI, AsyncOpenAI):
-    """Client to interact with Azure OpenAI Service."""
+    """
+    Client to interact with Azure OpenAI Service.
+
+    Requests go to the "full" tier (DEPLOYMENT_NAME, served by this client) unless their
+    template is listed in LLM_FAST_TEMPLATES and LLM_FAST_DEPLOYMENT_NAME is set; those go
+    to the "fast" tier, which has its own HTTP connection pool and admission quota.
+    """
     def __init__(self):
         if settings.ENDPOINT:
             super().__init__(
                 api_key=settings.AZURE_OPENAI_API_KEY,
                 azure_endpoint=settings.ENDPOINT,
                 api_version=settings.API_VERSION,
+                max_retries=0,
             )
             self.model = settings.DEPLOYMENT_NAME
         else:
-            super().__init__(api_key=settings.AZURE_OPENAI_API_KEY)
+            super().__init__(api_key=settings.AZURE_OPENAI_API_KEY, max_retries=0)
             self.model = settings.MODEL_NAME
+        # Retries, timeouts and rate limiting are handled by the admission layer.
+        retry = RetryPolicy(
+            max_retries=settings.LLM_MAX_RETRIES,
+            backoff_base_seconds=settings.LLM_BACKOFF_BASE_SECONDS,
+            backoff_max_seconds=settings.LLM_BACKOFF_MAX_SECONDS,
+            timeout_seconds=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+        )
+        self.admission = AdmissionController(
+            AdmissionLimits(
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            ),
+            retry,
+            tier="full",
+        )
+        self.tiers = {"full": LLMTier("full", self.model, self, self.admission)}
+        if settings.LLM_FAST_DEPLOYMENT_NAME:
+            self.tiers["fast"] = LLMTier(
+                "fast",
+                settings.LLM_FAST_DEPLOYMENT_NAME,
+                self._create_tier_client(),
+                AdmissionController(
+                    AdmissionLimits(
+                        max_concurrency=settings.LLM_FAST_MAX_CONCURRENCY,
+                        requests_per_minute=settings.LLM_FAST_REQUESTS_PER_MINUTE,
+                        tokens_per_minute=settings.LLM_FAST_TOKENS_PER_MINUTE,
+                    ),
+                    retry,
+                    tier="fast",
+                ),
+            )
+        self.fast_templates = set(settings.LLM_FAST_TEMPLATES)
+        self.response_cache = LLMResponseCache(
+            templates=settings.LLM_CACHE_TEMPLATES,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            disk_path=settings.LLM_CACHE_DISK_PATH,
+        ) if settings.LLM_CACHE_ENABLED else None
+        self.single_flight = SingleFlight() if settings.LLM_SINGLE_FLIGHT_ENABLED else None
 
-    async def get_chat_response(self, messages: list[dict]) -> str:
-        """Call Azure OpenAI chat completion API and return the response message."""
-        try:
-            response = await self.chat.completions.create(
-            model=self.model,
-            messages=messages)
-            message = response.choices[0].message.content
-            if not message or not message.strip():
-                logger.error("Empty response from LLM")
-                raise ValueError("Empty response from LLM")
+    @staticmethod
+    def _create_tier_client() -> AsyncOpenAI:
+        """Create a separate SDK client, and so a separate connection pool, for another deployment."""
+        if settings.ENDPOINT:
+            return AsyncAzureOpenAI(
+                api_key=settings.AZURE_OPENAI_API_KEY,
+                azure_endpoint=settings.ENDPOINT,
+                api_version=settings.API_VERSION,
+                max_retries=0,
+            )
+        return AsyncOpenAI(api_key=settings.AZURE_OPENAI_API_KEY, max_retries=0)
 
+    def tier_for(self, template_name: str | None) -> LLMTier:
+        """Return the model tier requests rendered from template_name are routed to."""
+        if template_name in self.fast_templates and "fast" in self.tiers:
+            return self.tiers["fast"]
+        return self.tiers["full"]
+
+    async def get_chat_response(self, messages: list[dict], template_name: str | None = None,
+                                response_format: dict | None = None,
+                                validate: Callable[[str], Any] | None = None) -> str:
+        """
+        Call Azure OpenAI chat completion API through the admission layer and return the response message.
+
+        :param messages: chat messages to send.
+        :param template_name: prompt template the messages were rendered from; completions
+            of templates opted in via LLM_CACHE_TEMPLATES are served from the response cache.
+            Identical concurrent requests share one in-flight completion (single flight).
+            The template also selects the model tier.
+        :param response_format: structured output mode passed to the API, e.g. a json_schema format.
+        :param validate: check of the reply, e.g. the caller's parser; a reply it raises ValueError
+            for is returned but not cached, so a cache hit never needs a repair request.
+        :raises LLMUnavailableError: when the request fails for good.
+        """
+        tier = self.tier_for(template_name)
+        request = {"model": tier.model, "messages": messages}
+        if response_format:
+            request["response_format"] = response_format
+        key = cache_key(tier.model, messages, response_format)
+        use_cache = self.response_cache is not None and self.response_cache.is_cacheable(template_name)
+        if use_cache:
+            cached = await self.response_cache.get(template_name, key)
+            if cached is not None:
+                record_usage(template_name, 0, 0, 0, cached=True)
+                return cached
+
+        async def complete() -> str:
+            message = await self._complete(tier, request, template_name)
+            if use_cache and _is_valid(validate, message):
+                await self.response_cache.set(key, message)
             return message
-        except openai.OpenAIError as e:
-            logger.error("Chat completion failed: %s", e)
-            return ""
+        if self.single_flight is None:
+            return await complete()
+        shared, message = await self.single_flight.do(key, complete)
+        if shared:
+            LLM_COALESCED.labels(template=str(template_name)).inc()
+            record_usage(template_name, 0, 0, 0, cached=True)
+        return message
+
+    async def _complete(self, tier: LLMTier, request: dict, template_name: str | None) -> str:
+        """
+        Send one completion request to a tier and return the response message.
+
+        :param request: keyword arguments of chat.completions.create (model, messages and options).
+        """
+        estimated_tokens = self.estimate_tokens(request["messages"])
+        started = time.perf_counter()
+        try:
+            response = await tier.admission.call(
+                lambda: tier.client.chat.completions.create(**request),
+                estimated_tokens)
+        except LLMUnavailableError as e:
+            LLM_REQUEST_SECONDS.labels(tier=tier.name, template=str(template_name), outcome="error").observe(
+                time.perf_counter() - started)
+            logger.error("Chat completion failed (%s tier): %s", tier.name, e)
+            raise
+        LLM_REQUEST_SECONDS.labels(tier=tier.name, template=str(template_name), outcome="ok").observe(
+            time.perf_counter() - started)
+        self._account_usage(template_name, estimated_tokens, response.usage, started)
+        message = response.choices[0].message.content
+        if not message or not message.strip():
+            logger.error("Empty response from LLM")
+            raise ValueError("Empty response from LLM")
+        return message
+
+    async def stream_chat_response(self, messages: list[dict], template_name: str | None = None) -> AsyncIterator[str]:
+        """
+        Call Azure OpenAI chat completion API in streaming mode and yield content deltas as they arrive.
+        Streamed completions bypass the response cache; the admission slot is held until the stream starts.
+        Usage is requested with stream_options (API version 2024-09-01 or later).
+
+        :param messages: chat messages to send.
+        :param template_name: prompt template the messages were rendered from, used as metrics
+            label and to select the model tier.
+        """
+        tier = self.tier_for(template_name)
+        estimated_tokens = self.estimate_tokens(messages)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            stream = await tier.admission.call(
+                lambda: tier.client.chat.completions.create(
+                model=tier.model,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True}),
+                estimated_tokens)
+            async for chunk in stream:
+                if chunk.usage:
+                    self._account_usage(template_name, estimated_tokens, chunk.usage, started)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            outcome = "ok"
+        except (LLMUnavailableError, openai.OpenAIError) as e:
+            logger.error("Streaming chat completion failed (%s tier): %s", tier.name, e)
+            raise
+        finally:
+            LLM_REQUEST_SECONDS.labels(tier=tier.name, template=str(template_name), outcome=outcome).observe(
+                time.perf_counter() - started)
+
+    def _account_usage(self, template_name: str | None, estimated_tokens: int, usage, started: float) -> None:
+        """Feed the usage reported by the API to the rate limiter, the metrics and the usage collectors."""
+        if not usage:
+            return
+        self.tier_for(template_name).admission.record_usage(estimated_tokens, usage.total_tokens)
+        LLM_TOKENS.labels(template=str(template_name), kind="prompt").observe(usage.prompt_tokens)
+        LLM_TOKENS.labels(template=str(template_name), kind="completion").observe(usage.completion_tokens)
+        record_usage(template_name, usage.prompt_tokens, usage.completion_tokens,
+                     latency_ms=round((time.perf_counter() - started) * 1000))
+
+    @staticmethod
+    def estimate_tokens(messages: list[dict]) -> int:
+        """Estimate prompt plus completion tokens of a request for the tokens-per-minute budget."""
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        return prompt_chars // 4 + settings.LLM_COMPLETION_TOKEN_RESERVE
 
 if __name__ == "__main__":
     import asyncio
@@ -0,0 +1,217 @@
+"""
+Client-side admission control for Azure OpenAI requests.
+
+Every completion request takes a slot from a global semaphore and draws from
+requests-per-minute and tokens-per-minute buckets sized to the deployment
+quota before it is sent. Throttled (429), timed-out and transient server errors
+are retried with jittered exponential backoff, honouring Retry-After.
+"""
+import time
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+import openai
+from src.app.core.log_config import setup_logging
+from src.app.core.metrics import LLM_ADMISSION_WAIT_SECONDS, LLM_QUEUE_DEPTH, LLM_IN_FLIGHT, LLM_RETRIES
+
+logger = setup_logging("LLM ADMISSION")
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when a completion request fails for good (non-retryable error or retries exhausted)."""
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """Return the delay requested by the server's Retry-After headers, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = response.headers.get(header)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+class TokenBucket:
+    """
+    Continuously refilling bucket holding at most per_minute units.
+    Waiters are served in arrival order.
+
+    :param per_minute: units (requests or tokens) replenished per minute.
+    """
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until amount units are available and take them."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """Give back (positive) or take (negative) units once the real usage is known."""
+        self._refill()
+        self.available = min(self.capacity, self.available + delta)
+
+@dataclass(frozen=True)
+class AdmissionLimits:
+    """
+    Concurrency and rate quota of one deployment.
+
+    :param max_concurrency: maximum requests in flight.
+    :param requests_per_minute: request quota of the deployment, 0 for unlimited.
+    :param tokens_per_minute: token quota of the deployment, 0 for unlimited.
+    """
+    max_concurrency: int
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Per-attempt timeout and jittered exponential backoff between attempts.
+
+    :param max_retries: retries after the first attempt for retryable errors.
+    :param backoff_base_seconds: base of the exponential backoff.
+    :param backoff_max_seconds: cap of a single backoff delay.
+    :param timeout_seconds: timeout of a single attempt.
+    """
+    max_retries: int
+    backoff_base_seconds: float
+    backoff_max_seconds: float
+    timeout_seconds: float
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+        retry_after = retry_after_seconds(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+class AdmissionController:
+    """
+    Bounds concurrency and request/token rate of LLM calls and retries transient failures.
+
+    :param limits: quota of the deployment the requests go to.
+    :param retry: timeout and backoff applied to each request.
+    :param tier: model tier label of the exported metrics.
+    """
+    def __init__(self, limits: AdmissionLimits, retry: RetryPolicy, tier: str = "full"):
+        self.semaphore = asyncio.Semaphore(limits.max_concurrency)
+        self.request_bucket = TokenBucket(limits.requests_per_minute) if limits.requests_per_minute else None
+        self.token_bucket = TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        self.retry = retry
+        self.tier = tier
+        self.metrics = {
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "in_flight": 0,
+            "admitted": 0,
+            "wait_seconds_total": 0.0,
+            "max_wait_seconds": 0.0,
+            "retries": 0,
+            "rate_limited": 0,
+            "timeouts": 0,
+            "failures": 0,
+        }
+        LLM_QUEUE_DEPTH.labels(tier=tier).set_function(lambda: self.metrics["queue_depth"])
+        LLM_IN_FLIGHT.labels(tier=tier).set_function(lambda: self.metrics["in_flight"])
+
+    async def _admit(self, estimated_tokens: int) -> None:
+        """Wait for a concurrency slot and rate budget, recording queue depth and wait time."""
+        metrics = self.metrics
+        metrics["queue_depth"] += 1
+        metrics["max_queue_depth"] = max(metrics["max_queue_depth"], metrics["queue_depth"])
+        started = time.monotonic()
+        try:
+            await self.semaphore.acquire()
+            try:
+                if self.request_bucket:
+                    await self.request_bucket.acquire(1)
+                if self.token_bucket:
+                    await self.token_bucket.acquire(estimated_tokens)
+            except BaseException:
+                self.semaphore.release()
+                raise
+        finally:
+            metrics["queue_depth"] -= 1
+        waited = time.monotonic() - started
+        metrics["admitted"] += 1
+        metrics["in_flight"] += 1
+        metrics["wait_seconds_total"] += waited
+        metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], waited)
+        LLM_ADMISSION_WAIT_SECONDS.labels(tier=self.tier).observe(waited)
+
+    def _release(self) -> None:
+        self.metrics["in_flight"] -= 1
+        self.semaphore.release()
+
+    async def call(self, make_request: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """
+        Send a request through admission control and return its result.
+
+        :param make_request: creates the request coroutine; called once per attempt.
+        :param estimated_tokens: prompt plus expected completion tokens drawn from the token bucket.
+        :raises LLMUnavailableError: on a non-retryable error or when retries are exhausted.
+        """
+        for attempt in range(self.retry.max_retries + 1):
+            await self._admit(estimated_tokens)
+            try:
+                return await asyncio.wait_for(make_request(), timeout=self.retry.timeout_seconds)
+            except RETRYABLE_ERRORS as e:
+                error = e
+            except openai.OpenAIError as e:
+                self.metrics["failures"] += 1
+                raise LLMUnavailableError(f"LLM request failed: {e}") from e
+            finally:
+                self._release()
+            if isinstance(error, openai.RateLimitError):
+                self.metrics["rate_limited"] += 1
+            elif isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError)):
+                self.metrics["timeouts"] += 1
+            if attempt == self.retry.max_retries:
+                break
+            delay = self.retry.delay(attempt, error)
+            self.metrics["retries"] += 1
+            LLM_RETRIES.labels(tier=self.tier, reason=type(error).__name__).inc()
+            logger.warning("LLM request failed (%s), retry %d/%d in %.2fs",
+                           type(error).__name__, attempt + 1, self.retry.max_retries, delay)
+            await asyncio.sleep(delay)
+        self.metrics["failures"] += 1
+        raise LLMUnavailableError(f"LLM request failed after {self.retry.max_retries + 1} attempts: {error}") from error
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket with the usage reported by the API."""
+        if self.token_bucket:
+            self.token_bucket.adjust(estimated_tokens - actual_tokens)
+
+    def stats(self) -> dict:
+        """Return queue-depth, wait-time and retry metrics."""
+        admitted = self.metrics["admitted"]
+        return {
+            **self.metrics,
+            "avg_wait_seconds": self.metrics["wait_seconds_total"] / admitted if admitted else 0.0,
+        }
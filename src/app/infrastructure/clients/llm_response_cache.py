@@ -0,0 +1,124 @@
+"""
+Content-addressed cache for LLM chat completions.
+
+Completions are keyed by a SHA-256 of the model name and the exact messages
+sent, so a prompt rendered from the same template and inputs is answered
+from the cache instead of Azure. Only templates listed in LLM_CACHE_TEMPLATES
+are cached; the conversational chat prompt never is.
+"""
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import defaultdict
+from src.app.core.ttl_cache import TTLCache
+from src.app.core.metrics import LLM_CACHE_LOOKUPS
+from src.app.core.log_config import setup_logging
+
+logger = setup_logging("LLM RESPONSE CACHE")
+
+NEVER_CACHED_TEMPLATES = {"chat_prompt_template.j2"}
+PURGE_EVERY_SETS = 1000  # expired rows are deleted on open and then every this many stores
+
+def cache_key(model: str, messages: list[dict], response_format: dict | None = None) -> str:
+    """Return the content hash identifying a completion request."""
+    request = {"model": model, "messages": messages}
+    if response_format:
+        request["response_format"] = response_format
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SQLiteResponseStore:
+    """On-disk completion store shared by all workers on a host; expired rows are purged as it is written."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sets = 0
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+        purged = self.purge_expired()
+        if purged:
+            logger.info("Purged %d expired responses from %s.", purged, path)
+
+    def get(self, key: str) -> str | None:
+        """Return the unexpired response stored under key, if any."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response FROM llm_responses WHERE key=? AND expires_at>?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, response: str, ttl_seconds: float) -> None:
+        """Store a response under key for ttl_seconds."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, time.time() + ttl_seconds),
+            )
+            self._connection.commit()
+            self._sets += 1
+            purge_due = self._sets % PURGE_EVERY_SETS == 0
+        if purge_due:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM llm_responses WHERE expires_at<=?", (time.time(),))
+            self._connection.commit()
+        return cursor.rowcount
+
+class LLMResponseCache:
+    """
+    Two-tier (memory LRU, optional SQLite) cache for completions of opted-in templates.
+
+    :param templates: template names whose completions may be cached.
+    :param max_entries: size of the in-memory LRU tier.
+    :param ttl_seconds: lifetime of a cached completion in both tiers.
+    :param disk_path: SQLite file for the on-disk tier, or None for memory only.
+    """
+    def __init__(self, templates: list[str], max_entries: int, ttl_seconds: int, disk_path: str | None = None):
+        self.templates = set(templates) - NEVER_CACHED_TEMPLATES
+        self.ttl_seconds = ttl_seconds
+        self.memory = TTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.disk = SQLiteResponseStore(disk_path) if disk_path else None
+        self.counters: dict[str, dict[str, int]] = defaultdict(lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+
+    def is_cacheable(self, template_name: str | None) -> bool:
+        """Return True if completions of template_name may be cached."""
+        return template_name in self.templates
+
+    async def get(self, template_name: str, key: str) -> str | None:
+        """Look a completion up in memory, then on disk."""
+        response = self.memory.get(key)
+        if response is not None:
+            self._count(template_name, "memory_hits")
+            return response
+        if self.disk:
+            response = await asyncio.to_thread(self.disk.get, key)
+            if response is not None:
+                self.memory.set(key, response)
+                self._count(template_name, "disk_hits")
+                return response
+        self._count(template_name, "misses")
+        return None
+
+    def _count(self, template_name: str, result: str) -> None:
+        self.counters[template_name][result] += 1
+        LLM_CACHE_LOOKUPS.labels(template=template_name, result=result).inc()
+
+    async def set(self, key: str, response: str) -> None:
+        """Store a completion in every tier."""
+        self.memory.set(key, response)
+        if self.disk:
+            await asyncio.to_thread(self.disk.set, key, response, self.ttl_seconds)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters per template."""
+        return {template: dict(counts) for template, counts in self.counters.items()}
@@ -0,0 +1,41 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+Calls made with a key that is already in flight do not start a new call; they
+wait for the running one and share its result (or exception). Unlike a result
+cache, nothing is kept once the call completes.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable
+
+class SingleFlight:
+    """Shares one in-flight task among concurrent callers using the same key."""
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, make_call: Callable[[], Awaitable[Any]]) -> tuple[bool, Any]:
+        """
+        Run make_call() unless a call with key is already in flight, and return (shared, result).
+
+        The call runs in its own task, so a cancelled caller does not cancel it for the others.
+
+        :param key: identity of the call, e.g. a hash of the request.
+        :param make_call: creates the call coroutine.
+        :return: shared is True when the result came from a call started by another caller.
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(make_call())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return shared, await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Return in-flight, started and coalesced call counts."""
+        return {"in_flight": len(self._in_flight), "calls": self.calls, "coalesced": self.coalesced}
@@ -1,15 +1,88 @@
 """SQL Client for executing raw SQL queries using SQLAlchemy engine."""
+import time
 from contextlib import contextmanager
-from sqlalchemy import text
+from typing import Iterator
+from sqlalchemy import Connection, Result, text
 from sqlalchemy.exc import SQLAlchemyError
+from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
 from src.app.core.database import engine
+from src.app.core.metrics import SQL_SECONDS, DB_POOL_CHECKOUT_SECONDS, timer, timed
 
 logger = setup_logging("SQL Client")
 
+def first_row(result: Result, as_dict: bool = True):
+    """Return the first row of result as a dictionary (or the row if not as_dict), or None if there is none."""
+    row = result.mappings().first() if as_dict else result.first()
+    if row is None:
+        logger.info("[Fetch One] No record found.")
+        return None
+    return dict(row) if as_dict else row
+
+class SQLUnitOfWork:
+    """
+    Runs several statements on one connection and in one transaction, with the query
+    methods of SQLClient. Obtained from SQLClient.unit_of_work().
+    """
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    def insert(self, query: str, values: dict | list[dict] = None) -> dict:
+        """
+        Executes an INSERT query with the provided values; a list of dicts inserts one row per dict.
+
+        :param query: query to be executed
+        :param values: values to be inserted
+        """
+        if isinstance(values, list) and isinstance(values[0], dict):
+            self.connection.execute(text(query), values)
+            logger.info("[Insert] (Batch) Inserted %d records.", len(values))
+            return {"status": "success"}
+        self.connection.execute(text(query), values or {})
+        logger.info("[Insert] Inserted single record.")
+        return {"status": "success"}
+
+    def insert_returning_id(self, query: str, values: dict = None):
+        """
+        Executes an INSERT ... RETURNING id query and returns the inserted record's ID.
+
+        :param query: query to be executed
+        :param values: values to be inserted
+        """
+        inserted_id = self.connection.execute(text(query), values or {}).scalar_one_or_none()
+        logger.info("[Insert Returning ID] Inserted record with ID: %s", inserted_id)
+        return inserted_id
+
+    def fetch_all(self, query: str, params: dict = None, as_dict: bool = True) -> list:
+        """
+        Execute a SELECT query and return all results.
+
+        :param query: The SQL query to execute.
+        :param params: Optional parameters for the SQL query.
+        :return: List of {first column: second column} dictionaries, or the rows if not as_dict.
+        """
+        rows = self.connection.execute(text(query), params or {}).fetchall()
+        logger.info("[Fetch All] Retrieved %d records.", len(rows))
+        if as_dict:
+            return [{row[0] : row[1]} for row in rows]
+        return rows
+
+    def fetch_one(self, query: str, params: dict = None, as_dict: bool = True):
+        """
+        Execute a SELECT query and return a single result.
+
+        :param query: The SQL query to execute.
+        :param params: Optional parameters for the SQL query.
+        :return: A dictionary (or the row if not as_dict) representing the single result, or None if no result.
+        """
+        return first_row(self.connection.execute(text(query), params or {}), as_dict)
+
 class SQLClient:
     """
     SQL Client for executing raw SQL queries using SQLAlchemy engine.
+
+    Every query method runs in its own transaction; use unit_of_work() to run
+    several statements of one request on a single connection and transaction.
     """
     def __init__(self):
         self.engine = engine
@@ -20,15 +93,27 @@ class SQLClient:
         Context manager to get a database connection.
         Sets up a transactional DB connection.
         """
-        with self.engine.begin() as connection:
-            try:
-                yield connection
-            except SQLAlchemyError as e:
-                logger.error("[Session] An error occurred during session: %s", e)
-                raise
-            finally:
-                logger.info("[Session] Closing database connection.")
+        with timer(SQL_SECONDS, method="session"):
+            started = time.perf_counter()
+            with self.engine.connect() as connection:
+                DB_POOL_CHECKOUT_SECONDS.labels(engine="sync").observe(time.perf_counter() - started)
+                try:
+                    with connection.begin():
+                        yield connection
+                except SQLAlchemyError as e:
+                    logger.error("[Session] An error occurred during session: %s", e)
+                    raise
+
+    @contextmanager
+    def unit_of_work(self) -> Iterator[SQLUnitOfWork]:
+        """
+        Context manager running every statement of the with-block on one connection,
+        committed together when the block exits and rolled back if it raises.
+        """
+        with self.session() as connection:
+            yield SQLUnitOfWork(connection)
 
+    @timed(SQL_SECONDS, method="execute_without_params")
     def execute_without_params(self, query: str):
         """
         Execute a raw SQL query without parameters within a managed session.
@@ -44,6 +129,7 @@ class SQLClient:
                 logger.error("[Execute without params] Error executing query: %s", e)
                 raise
 
+    @timed(SQL_SECONDS, method="execute_with_params")
     def execute_with_params(self, query: str, params: dict = None):
         """
         Execute a raw SQL query with parameters within a managed session.
@@ -60,6 +146,7 @@ class SQLClient:
                 logger.error("[Execute with params] Error executing query: %s", e)
                 raise
 
+    @timed(SQL_SECONDS, method="insert")
     def insert(self, query: str, values: dict | list[dict] = None):
         """
         Executes an INSERT query with the provided values, and returns None.
@@ -68,19 +155,13 @@ class SQLClient:
         :param values: values to be inserted
         """
         try:
-            with self.session() as connection:
-                if isinstance(values, list) and isinstance(values[0], dict):
-                    connection.execute(text(query), values)
-                    logger.info("[Insert] (Batch) Inserted multiple records.")
-                    return {"status": "success"}
-                connection.execute(text(query), values or {})
-                logger.info("[Insert] Inserted single record.")
-                return {"status": "success"}
-
+            with self.unit_of_work() as uow:
+                return uow.insert(query, values)
         except SQLAlchemyError as e:
             logger.error("[Insert] Error executing insert: %s", e)
             raise
 
+    @timed(SQL_SECONDS, method="insert_returning_id")
     def insert_returning_id(self, query: str, values: dict = None) -> int:
         """
         Executes an INSERT query with the provided values, and returns the inserted record's ID.
@@ -90,15 +171,13 @@ class SQLClient:
         :return: ID of the inserted record
         """
         try:
-            with self.session() as connection:
-                result = connection.execute(text(query), values or {})
-                inserted_id = result.scalar_one_or_none()
-                logger.info("[Insert Returning ID] Inserted record with ID: %s", inserted_id)
-                return inserted_id
+            with self.unit_of_work() as uow:
+                return uow.insert_returning_id(query, values)
         except SQLAlchemyError as e:
             logger.error("[Insert Returning ID] Error executing insert: %s", e)
             raise
 
+    @timed(SQL_SECONDS, method="fetch_all")
     def fetch_all(self, query: str, params: dict = None, as_dict: bool = True):
         """
         Execute a SELECT query and return all results as a list of dictionaries.
@@ -108,20 +187,36 @@ class SQLClient:
         :return: List of dictionaries representing the result set.
         """
         try:
-            with self.session() as connection:
-                result = connection.execute(text(query), params or {})
-                if as_dict:
-                    results = result.fetchall()
-                    rows = [{row[0] : row[1]} for row in results]
-                    logger.info("[Fetch All] Retrieved %d records.", len(rows))
-                    return rows
-                rows = result.fetchall()
-                logger.info("[Fetch All] Retrieved %d records.", len(rows))
-                return rows
+            with self.unit_of_work() as uow:
+                return uow.fetch_all(query, params, as_dict)
         except SQLAlchemyError as e:
             logger.error("[Fetch All] Error executing fetch: %s", e)
             raise
 
+    def iter_batches(self, query: str, params: dict = None, batch_size: int = None) -> Iterator[list[dict]]:
+        """
+        Execute a SELECT query on a server-side cursor and yield its rows lazily, as lists of
+        up to batch_size dictionaries, so that memory does not grow with the result.
+        The connection and its transaction stay open until the iterator is exhausted or closed.
+
+        :param query: The SQL query to execute.
+        :param params: Optional parameters for the SQL query.
+        :param batch_size: Rows fetched from the server at a time, DB_STREAM_BATCH_SIZE by default.
+        """
+        batch_size = batch_size or settings.DB_STREAM_BATCH_SIZE
+        streamed = 0
+        try:
+            with self.session() as connection:
+                result = connection.execution_options(stream_results=True).execute(text(query), params or {})
+                for partition in result.mappings().partitions(batch_size):
+                    streamed += len(partition)
+                    yield [dict(row) for row in partition]
+        except SQLAlchemyError as e:
+            logger.error("[Stream] Error executing streamed fetch: %s", e)
+            raise
+        logger.info("[Stream] Streamed %d records.", streamed)
+
+    @timed(SQL_SECONDS, method="fetch_one")
     def fetch_one(self, query: str, params: dict = None, as_dict: bool = True) -> dict | None:
         """
         Execute a SELECT query and return a single result as a dictionary.
@@ -131,16 +226,8 @@ class SQLClient:
         :return: A dictionary representing the single result, or None if no result.
         """
         try:
-            with self.session() as connection:
-                result = connection.execute(text(query), params or {})
-                row = result.mappings().first() if as_dict else result.first()
-                if row:
-                    if not as_dict:
-                        record = row
-                    record = dict(row)
-                    return record
-                logger.info("[Fetch One] No record found.")
-                return None
+            with self.unit_of_work() as uow:
+                return uow.fetch_one(query, params, as_dict)
         except SQLAlchemyError as e:
             logger.error("[Fetch One] Error executing fetch: %s", e)
             raise
@@ -0,0 +1,499 @@
+"""
+Postgres-backed LangGraph checkpointer with a bounded in-process hot tier.
+
+Every checkpoint, channel blob and pending write is written through to the
+agent_checkpoint* tables, so any uvicorn worker can resume any session. The
+most recently used threads are also kept in memory (the InMemorySaver
+structures this class inherits) and evicted when they go idle or when the
+thread or byte cap is exceeded. A cold thread is loaded with its latest
+checkpoint only; the ancestors that delta channel replay needs are loaded on
+demand, ANCESTOR_BATCH at a time.
+"""
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from typing import Any, NamedTuple
+from sqlalchemy import Connection, Row, text
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    DeltaChannelHistory,
+    get_checkpoint_id,
+)
+from src.app.core.log_config import setup_logging
+from src.app.core.metrics import CHECKPOINT_SECONDS, timed
+from src.app.infrastructure.clients.sql_client import SQLClient
+
+logger = setup_logging("CHECKPOINT STORE")
+
+INSERT_CHECKPOINT = """INSERT INTO agent_checkpoints
+    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, metadata_type, metadata_blob, created_at)
+    VALUES (:thread_id, :checkpoint_ns, :checkpoint_id, :parent_checkpoint_id, :checkpoint_type, :checkpoint_blob, :metadata_type, :metadata_blob, NOW())
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) DO NOTHING"""
+
+INSERT_BLOB = """INSERT INTO agent_checkpoint_blobs (thread_id, checkpoint_ns, channel, version, blob_type, blob)
+    VALUES (:thread_id, :checkpoint_ns, :channel, :version, :blob_type, :blob)
+    ON CONFLICT (thread_id, checkpoint_ns, channel, version) DO NOTHING"""
+
+UPSERT_WRITE = """INSERT INTO agent_checkpoint_writes
+    (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, blob_type, blob, task_path)
+    VALUES (:thread_id, :checkpoint_ns, :checkpoint_id, :task_id, :idx, :channel, :blob_type, :blob, :task_path)
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    DO UPDATE SET channel = EXCLUDED.channel, blob_type = EXCLUDED.blob_type, blob = EXCLUDED.blob, task_path = EXCLUDED.task_path"""
+
+ANCESTOR_BATCH = 50  # ancestors read per round trip while walking a parent chain
+
+CHECKPOINT_COLUMNS = "checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, metadata_type, metadata_blob"
+
+SELECT_LATEST_CHECKPOINTS = f"""SELECT DISTINCT ON (checkpoint_ns) {CHECKPOINT_COLUMNS}
+    FROM agent_checkpoints WHERE thread_id=:thread_id
+    ORDER BY checkpoint_ns, checkpoint_id DESC"""
+
+SELECT_ANCESTORS = f"""WITH RECURSIVE chain AS (
+        SELECT {CHECKPOINT_COLUMNS}, 1 AS depth FROM agent_checkpoints
+        WHERE thread_id=:thread_id AND checkpoint_ns=:checkpoint_ns AND checkpoint_id=:checkpoint_id
+        UNION ALL
+        SELECT c.checkpoint_ns, c.checkpoint_id, c.parent_checkpoint_id, c.checkpoint_type, c.checkpoint_blob,
+            c.metadata_type, c.metadata_blob, chain.depth + 1
+        FROM agent_checkpoints c JOIN chain ON c.checkpoint_id = chain.parent_checkpoint_id
+        WHERE c.thread_id=:thread_id AND c.checkpoint_ns=:checkpoint_ns AND chain.depth < :depth
+    )
+    SELECT {CHECKPOINT_COLUMNS} FROM chain ORDER BY depth"""
+
+SELECT_BLOBS = """SELECT b.checkpoint_ns, b.channel, b.version, b.blob_type, b.blob
+    FROM agent_checkpoint_blobs b
+    JOIN unnest(CAST(:namespaces AS text[]), CAST(:channels AS text[]), CAST(:versions AS text[])) AS k(checkpoint_ns, channel, version)
+        ON b.checkpoint_ns = k.checkpoint_ns AND b.channel = k.channel AND b.version = k.version
+    WHERE b.thread_id=:thread_id"""
+
+SELECT_WRITES = """SELECT w.checkpoint_ns, w.checkpoint_id, w.task_id, w.idx, w.channel, w.blob_type, w.blob, w.task_path
+    FROM agent_checkpoint_writes w
+    JOIN unnest(CAST(:namespaces AS text[]), CAST(:checkpoint_ids AS text[])) AS k(checkpoint_ns, checkpoint_id)
+        ON w.checkpoint_ns = k.checkpoint_ns AND w.checkpoint_id = k.checkpoint_id
+    WHERE w.thread_id=:thread_id"""
+
+class ThreadRows(NamedTuple):
+    """Checkpoint, blob and write rows of one thread read from Postgres."""
+    checkpoints: Sequence[Row]
+    blobs: Sequence[Row]
+    writes: Sequence[Row]
+
+def _thread_key(config: RunnableConfig) -> RunnableConfig:
+    """Return config with its thread_id normalised to str, as stored in Postgres."""
+    configurable = dict(config["configurable"])
+    configurable["thread_id"] = str(configurable["thread_id"])
+    return {**config, "configurable": configurable}
+
+class PostgresCheckpointSaver(InMemorySaver):
+    """
+    Write-through Postgres checkpointer with an LRU hot tier.
+
+    :param sql_client: client used for all Postgres access.
+    :param max_threads: maximum number of threads kept in memory.
+    :param max_bytes: maximum serialized bytes kept in memory across all threads.
+    :param idle_ttl_seconds: threads untouched for this long are evicted from memory.
+    :param verify_hot_reads: check Postgres for a newer checkpoint before serving a
+        hot thread, needed when requests of one session can land on different workers.
+    """
+    def __init__(
+        self,
+        sql_client: SQLClient,
+        *,
+        max_threads: int,
+        max_bytes: int,
+        idle_ttl_seconds: int,
+        verify_hot_reads: bool = True,
+    ):
+        super().__init__()
+        self.sql_client = sql_client
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.verify_hot_reads = verify_hot_reads
+        # thread_id -> [last access (monotonic), serialized bytes held in memory]
+        self._hot: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.RLock()
+
+    # ---- hot tier -------------------------------------------------------
+    # _lock guards the in-memory maps only; Postgres is never read or written
+    # while it is held, so sessions of one worker do not queue behind each
+    # other's round trips.
+
+    @contextmanager
+    def _hot_thread(self, thread_id: str, verify: bool = False) -> Iterator[None]:
+        """Hold _lock with thread_id loaded in memory and marked most recently used."""
+        while True:
+            self._ensure_hot(thread_id, verify)
+            with self._lock:
+                entry = self._hot.get(thread_id)
+                if entry is not None:  # else evicted by another session meanwhile: load again
+                    entry[0] = time.monotonic()
+                    self._hot.move_to_end(thread_id)
+                    yield
+                    return
+            verify = False
+
+    def _ensure_hot(self, thread_id: str, verify: bool) -> None:
+        """Load the latest checkpoint of thread_id unless memory holds an up-to-date copy."""
+        with self._lock:
+            entry = self._hot.get(thread_id)
+            if entry is not None and time.monotonic() - entry[0] > self.idle_ttl_seconds:
+                self._drop_from_memory(thread_id)
+                entry = None
+            if entry is not None and not (verify and self.verify_hot_reads):
+                return
+            in_memory = self._latest_in_memory(thread_id)
+        if entry is not None:
+            if not self._is_stale(thread_id, in_memory):
+                return
+            logger.info("[Hot tier] Thread %s changed in Postgres, reloading.", thread_id)
+        rows = self._load_latest(thread_id)
+        with self._lock:
+            if entry is not None:
+                self._drop_from_memory(thread_id)
+            elif thread_id in self._hot:  # loaded by a concurrent call
+                return
+            self._hot[thread_id] = [time.monotonic(), 0]
+            nbytes = self._install(thread_id, rows)
+            self._evict(keep=thread_id)
+        logger.info("[Hot tier] Loaded thread %s (%d checkpoints, %d bytes).", thread_id, len(rows.checkpoints), nbytes)
+
+    def _latest_in_memory(self, thread_id: str) -> str | None:
+        """Return the newest checkpoint id held in memory for a thread."""
+        ids = [cid for ns in self.storage.get(thread_id, {}).values() for cid in ns]
+        return max(ids, default=None)
+
+    def _is_stale(self, thread_id: str, in_memory: str | None) -> bool:
+        """Return True if Postgres has a checkpoint newer than in_memory (checkpoint ids sort by time)."""
+        row = self.sql_client.fetch_one(
+            query="SELECT MAX(checkpoint_id) AS checkpoint_id FROM agent_checkpoints WHERE thread_id=:thread_id",
+            params={"thread_id": thread_id},
+        )
+        latest = row["checkpoint_id"] if row else None
+        return latest is not None and (in_memory is None or latest > in_memory)
+
+    @timed(CHECKPOINT_SECONDS, operation="load_thread")
+    def _load_latest(self, thread_id: str) -> ThreadRows:
+        """Read the latest checkpoint of every namespace of a thread, with its blobs and writes."""
+        with self.sql_client.session() as connection:
+            checkpoints = connection.execute(text(SELECT_LATEST_CHECKPOINTS), {"thread_id": thread_id}).fetchall()
+            return self._related_rows(connection, thread_id, checkpoints)
+
+    @timed(CHECKPOINT_SECONDS, operation="load_ancestors")
+    def _load_ancestors(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> ThreadRows:
+        """Read checkpoint_id and up to ANCESTOR_BATCH - 1 of its ancestors, with their blobs and writes."""
+        with self.sql_client.session() as connection:
+            checkpoints = connection.execute(text(SELECT_ANCESTORS), {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id, "depth": ANCESTOR_BATCH,
+            }).fetchall()
+            return self._related_rows(connection, thread_id, checkpoints)
+
+    def _related_rows(self, connection: Connection, thread_id: str, checkpoints: Sequence[Row]) -> ThreadRows:
+        """Read the channel blobs and pending writes of the given checkpoint rows."""
+        blob_keys = {
+            (row.checkpoint_ns, channel, str(version))
+            for row in checkpoints
+            for channel, version in self.serde.loads_typed(
+                (row.checkpoint_type, bytes(row.checkpoint_blob)))["channel_versions"].items()
+        }
+        blobs = connection.execute(text(SELECT_BLOBS), {
+            "thread_id": thread_id,
+            "namespaces": [key[0] for key in blob_keys],
+            "channels": [key[1] for key in blob_keys],
+            "versions": [key[2] for key in blob_keys],
+        }).fetchall() if blob_keys else []
+        writes = connection.execute(text(SELECT_WRITES), {
+            "thread_id": thread_id,
+            "namespaces": [row.checkpoint_ns for row in checkpoints],
+            "checkpoint_ids": [row.checkpoint_id for row in checkpoints],
+        }).fetchall() if checkpoints else []
+        return ThreadRows(checkpoints, blobs, writes)
+
+    def _install(self, thread_id: str, rows: ThreadRows) -> int:
+        """Add rows read from Postgres to a hot thread in memory; return the bytes added."""
+        nbytes = 0
+        for row in rows.checkpoints:
+            self.storage[thread_id][row.checkpoint_ns].setdefault(row.checkpoint_id, (
+                (row.checkpoint_type, bytes(row.checkpoint_blob)),
+                (row.metadata_type, bytes(row.metadata_blob)),
+                row.parent_checkpoint_id,
+            ))
+            nbytes += len(row.checkpoint_blob) + len(row.metadata_blob)
+        for row in rows.blobs:
+            self.blobs.setdefault((thread_id, row.checkpoint_ns, row.channel, row.version), (row.blob_type, bytes(row.blob or b"")))
+            nbytes += len(row.blob or b"")
+        for row in rows.writes:
+            self.writes[(thread_id, row.checkpoint_ns, row.checkpoint_id)].setdefault((row.task_id, row.idx), (
+                row.task_id, row.channel, (row.blob_type, bytes(row.blob or b"")), row.task_path
+            ))
+            nbytes += len(row.blob or b"")
+        self._account(thread_id, nbytes)
+        return nbytes
+
+    def _missing_ancestor(self, config: RunnableConfig, channels: Sequence[str]) -> str | None:
+        """
+        Return the first ancestor not in memory that delta channel replay of config would need,
+        walking the parent chain like InMemorySaver.get_delta_channel_history.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        ns_storage = self.storage.get(thread_id, {}).get(checkpoint_ns, {})
+        target = ns_storage.get(get_checkpoint_id(config) or max(ns_storage, default=""))
+        current = target[2] if target is not None else None
+        remaining = set(channels)
+        while current is not None and remaining:
+            entry = ns_storage.get(current)
+            if entry is None:
+                return current
+            versions = self.serde.loads_typed(entry[0]).get("channel_versions", {})
+            remaining = {
+                channel for channel in remaining
+                if self.blobs.get((thread_id, checkpoint_ns, channel, versions.get(channel)), ("empty",))[0] == "empty"
+            }
+            current = entry[2]
+        return None
+
+    def _account(self, thread_id: str, nbytes: int) -> None:
+        """Add nbytes of newly written data to a hot thread's footprint."""
+        self._hot[thread_id][1] += nbytes
+
+    def _hot_bytes(self) -> int:
+        """Return the serialized bytes held in memory across all hot threads."""
+        return sum(nbytes for _, nbytes in self._hot.values())
+
+    def _drop_from_memory(self, thread_id: str) -> None:
+        """Forget a thread in memory only; Postgres keeps it."""
+        self._hot.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+    def _evict(self, keep: str | None = None) -> None:
+        """Evict idle threads, then least recently used ones until the caps are met."""
+        now = time.monotonic()
+        for thread_id, (last_access, _) in list(self._hot.items()):
+            if thread_id != keep and now - last_access > self.idle_ttl_seconds:
+                self._drop_from_memory(thread_id)
+        while len(self._hot) > 1 and (len(self._hot) > self.max_threads or self._hot_bytes() > self.max_bytes):
+            thread_id = next(iter(self._hot))
+            if thread_id == keep:
+                self._hot.move_to_end(thread_id)
+                thread_id = next(iter(self._hot))
+            self._drop_from_memory(thread_id)
+
+    def stats(self) -> dict:
+        """Return the current hot tier footprint."""
+        with self._lock:
+            return {"hot_threads": len(self._hot), "hot_bytes": self._hot_bytes()}
+
+    # ---- BaseCheckpointSaver --------------------------------------------
+
+    @timed(CHECKPOINT_SECONDS, operation="get_tuple")
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Return a checkpoint tuple, loading the thread from Postgres when it is cold."""
+        config = _thread_key(config)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._hot_thread(thread_id, verify=True):
+            if not checkpoint_id or checkpoint_id in self.storage[thread_id][checkpoint_ns]:
+                return super().get_tuple(config)
+        # an older checkpoint than the latest one, e.g. the parent of a pending run
+        rows = self._load_ancestors(thread_id, checkpoint_ns, checkpoint_id)
+        with self._hot_thread(thread_id):
+            self._install(thread_id, rows)
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """
+        List the checkpoints of a thread held in memory: its latest checkpoint and the ancestors
+        loaded for delta channel replay. Without a config only hot threads are listed.
+        """
+        if config:
+            config = _thread_key(config)
+            with self._hot_thread(config["configurable"]["thread_id"], verify=True):
+                items = list(super().list(config, filter=filter, before=before, limit=limit))
+        else:
+            with self._lock:
+                items = list(super().list(config, filter=filter, before=before, limit=limit))
+        yield from items
+
+    @timed(CHECKPOINT_SECONDS, operation="put")
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint in memory and write it through to Postgres."""
+        config = _thread_key(config)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        with self._hot_thread(thread_id):
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            serialized, metadata_blob, parent_id = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+            blob_rows = [
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "channel": channel, "version": str(version),
+                 "blob_type": self.blobs[(thread_id, checkpoint_ns, channel, version)][0],
+                 "blob": self.blobs[(thread_id, checkpoint_ns, channel, version)][1]}
+                for channel, version in new_versions.items()
+            ]
+            self._account(thread_id, len(serialized[1]) + len(metadata_blob[1]) + sum(len(row["blob"]) for row in blob_rows))
+            self._evict(keep=thread_id)
+        with self._write_through(thread_id), self.sql_client.session() as connection:
+            if blob_rows:
+                connection.execute(text(INSERT_BLOB), blob_rows)
+            connection.execute(text(INSERT_CHECKPOINT), {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+                "parent_checkpoint_id": parent_id,
+                "checkpoint_type": serialized[0],
+                "checkpoint_blob": serialized[1],
+                "metadata_type": metadata_blob[0],
+                "metadata_blob": metadata_blob[1],
+            })
+        return next_config
+
+    @timed(CHECKPOINT_SECONDS, operation="put_writes")
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store pending writes in memory and write them through to Postgres."""
+        config = _thread_key(config)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        with self._hot_thread(thread_id):
+            super().put_writes(config, writes, task_id, task_path)
+            stored = self.writes.get((thread_id, checkpoint_ns, checkpoint_id), {})
+            rows = [
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id,
+                 "task_id": task_id, "idx": idx, "channel": channel, "blob_type": blob[0], "blob": blob[1],
+                 "task_path": path}
+                for (write_task_id, idx), (_, channel, blob, path) in stored.items()
+                if write_task_id == task_id
+            ]
+            if not rows:
+                return
+            self._account(thread_id, sum(len(row["blob"]) for row in rows))
+        with self._write_through(thread_id):
+            self.sql_client.insert(query=UPSERT_WRITE, values=rows)
+
+    @contextmanager
+    def _write_through(self, thread_id: str) -> Iterator[None]:
+        """Forget the thread in memory if its write to Postgres fails, so memory never runs ahead of Postgres."""
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self._drop_from_memory(thread_id)
+            raise
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete a thread from memory and from Postgres."""
+        thread_id = str(thread_id)
+        with self._lock:
+            self._drop_from_memory(thread_id)
+        with self.sql_client.session() as connection:
+            for table in ("agent_checkpoint_writes", "agent_checkpoint_blobs", "agent_checkpoints"):
+                connection.execute(text(f"DELETE FROM {table} WHERE thread_id=:thread_id"), {"thread_id": thread_id})
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """Delete whole threads; partial pruning would break delta channel replay."""
+        if strategy != "delete":
+            raise NotImplementedError("PostgresCheckpointSaver only supports the 'delete' prune strategy.")
+        for thread_id in thread_ids:
+            self.delete_thread(thread_id)
+
+    def delete_for_runs(self, run_ids: Sequence[str]) -> None:
+        """Not supported: sessions are only ever deleted as whole threads."""
+        raise NotImplementedError("PostgresCheckpointSaver deletes whole threads only.")
+
+    def copy_thread(self, source_thread_id: str, target_thread_id: str) -> None:
+        """Not supported: sessions are never forked."""
+        raise NotImplementedError("PostgresCheckpointSaver does not copy threads.")
+
+    def get_delta_channel_history(
+        self, *, config: RunnableConfig, channels: Sequence[str]
+    ) -> Mapping[str, DeltaChannelHistory]:
+        """Walk the parent chain of a thread, loading the ancestors replay needs from Postgres."""
+        config = _thread_key(config)
+        thread_id = config["configurable"]["thread_id"]
+        loaded = set()
+        while True:
+            with self._hot_thread(thread_id):
+                missing = self._missing_ancestor(config, channels)
+                if missing is None or missing in loaded:
+                    return super().get_delta_channel_history(config=config, channels=channels)
+            loaded.add(missing)
+            rows = self._load_ancestors(thread_id, config["configurable"].get("checkpoint_ns", ""), missing)
+            with self._hot_thread(thread_id):
+                self._install(thread_id, rows)
+
+    # Postgres round trips must not block the event loop serving other sessions.
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """Async get_tuple running the Postgres access in a worker thread."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Async list running the Postgres access in a worker thread."""
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Async put running the Postgres write in a worker thread."""
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Async put_writes running the Postgres write in a worker thread."""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Async delete_thread running the Postgres delete in a worker thread."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aget_delta_channel_history(
+        self, *, config: RunnableConfig, channels: Sequence[str]
+    ) -> Mapping[str, DeltaChannelHistory]:
+        """Async get_delta_channel_history running in a worker thread."""
+        return await asyncio.to_thread(lambda: self.get_delta_channel_history(config=config, channels=channels))
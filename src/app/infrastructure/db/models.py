@@ -1,6 +1,6 @@
 """
 Database models for user profiles, vehicle information, insurance policies,
-sessions, messages, and tow requests.
+sessions, messages, LLM usage, tow requests and agent checkpoints.
 """
 import uuid
 from datetime import datetime
@@ -10,7 +10,10 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     Text,
-    ForeignKey
+    Integer,
+    LargeBinary,
+    ForeignKey,
+    Index
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -45,6 +48,8 @@ class UserProfile(Base):
     audio_transcripts = relationship("AudioTranscript", back_populates="user")
     geo_locations = relationship("geo_location", back_populates="user")
 
+    __table_args__ = (Index("ix_user_profiles_name", "name"),)
+
 class VehicleInfo(Base):
     """Model for vehicle information."""
     __tablename__ = "vehicle_info"
@@ -71,6 +76,8 @@ class VehicleInfo(Base):
     sessions = relationship("Session", back_populates="vehicle")
     tow_requests = relationship("TowRequest", back_populates="vehicle")
 
+    __table_args__ = (Index("ix_vehicle_info_user_id", "user_id"),)
+
 class InsurancePolicyDetails(Base):
     """Model for insurance policy details."""
     __tablename__ = "insurance_policy_details"
@@ -96,6 +103,11 @@ class InsurancePolicyDetails(Base):
     vehicle = relationship("VehicleInfo", back_populates="insurance_policies")
     tow_requests = relationship("TowRequest", back_populates="insurance_policy")
 
+    __table_args__ = (
+        Index("ix_insurance_policy_details_vehicle_id", "vehicle_id"),
+        Index("ix_insurance_policy_details_user_id", "user_id"),
+    )
+
 class Session(Base):
     """Model for user sessions."""
     __tablename__ = "sessions"
@@ -107,12 +119,15 @@ class Session(Base):
     started_at = Column(DateTime, default=datetime.utcnow)
 
     messages = relationship("Message", back_populates="session")
+    llm_usage = relationship("LLMUsage", back_populates="session")
     user = relationship("UserProfile", back_populates="sessions")
     vehicle = relationship("VehicleInfo", back_populates="sessions")
     audio_transcripts = relationship("AudioTranscript", back_populates="session")
     geo_locations = relationship("geo_location", back_populates="session")
     #tow_request = relationship("TowRequest", back_populates="session", uselist=False)
 
+    __table_args__ = (Index("ix_sessions_user_id_vehicle_id", "user_id", "vehicle_id"),)
+
 class Message(Base):
     """Model for messages."""
     __tablename__ = "messages"
@@ -127,6 +142,27 @@ class Message(Base):
     session = relationship("Session", back_populates="messages")
     user = relationship("UserProfile", back_populates="messages")
 
+    __table_args__ = (Index("ix_messages_session_id_created_at_id", "session_id", "created_at", "id"),)
+
+class LLMUsage(Base):
+    """Model for the token usage of one LLM call made during a session."""
+    __tablename__ = "llm_usage"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user_profiles.id"), nullable=False)
+    session_id = Column(UUID(as_uuid=True), ForeignKey("sessions.id"), nullable=False)
+    node = Column(String, nullable=False)  # graph node that made the call
+    template = Column(String, nullable=True)  # prompt template, e.g. "chat_prompt_template.j2"
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    latency_ms = Column(Integer, nullable=False, default=0)
+    cached = Column(Boolean, nullable=False, default=False)  # served without an API call (response cache or coalesced)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    session = relationship("Session", back_populates="llm_usage")
+
+    __table_args__ = (Index("ix_llm_usage_session_id", "session_id"),)
+
 class AudioTranscript(Base):
     """Model for audio transcripts."""
     __tablename__ = "audio_transcripts"
@@ -175,3 +211,42 @@ class TowRequest(Base):
     user = relationship("UserProfile", back_populates="tow_requests")
     vehicle = relationship("VehicleInfo", back_populates="tow_requests")
     insurance_policy = relationship("InsurancePolicyDetails", back_populates="tow_requests")
+
+class AgentCheckpoint(Base):
+    """Model for FRIA agent graph checkpoints, one row per checkpoint of a session thread."""
+    __tablename__ = "agent_checkpoints"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    parent_checkpoint_id = Column(String, nullable=True)
+    checkpoint_type = Column(String, nullable=False)
+    checkpoint_blob = Column(LargeBinary, nullable=False)
+    metadata_type = Column(String, nullable=False)
+    metadata_blob = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class AgentCheckpointBlob(Base):
+    """Model for serialized channel values referenced by agent checkpoints."""
+    __tablename__ = "agent_checkpoint_blobs"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    channel = Column(String, primary_key=True)
+    version = Column(String, primary_key=True)
+    blob_type = Column(String, nullable=False)
+    blob = Column(LargeBinary, nullable=True)
+
+class AgentCheckpointWrite(Base):
+    """Model for pending writes recorded against an agent checkpoint."""
+    __tablename__ = "agent_checkpoint_writes"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    task_id = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String, nullable=False)
+    blob_type = Column(String, nullable=False)
+    blob = Column(LargeBinary, nullable=True)
+    task_path = Column(String, nullable=False, default="")
@@ -0,0 +1,189 @@
+"""
+Write-behind buffer for append-only INSERTs that do not need to be on the
+request's critical path (chat messages, audio transcripts).
+
+Rows are queued in process memory and written by a background task with one
+batched INSERT per statement, all in one transaction, as soon as
+max_batch_rows are pending or every flush_interval_seconds. When max_pending
+rows are queued, writers wait for the next flush (backpressure). close()
+drains everything that is still pending, so rows survive a graceful shutdown;
+rows pending in a worker that crashes are lost.
+
+Readers merge pending() into their query results to read their own writes;
+a row stays visible in pending() until the transaction writing it commits.
+"""
+import time
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from src.app.core.log_config import setup_logging
+from src.app.core.metrics import WRITE_BEHIND_PENDING, WRITE_BEHIND_ROWS, WRITE_BEHIND_WAIT_SECONDS
+from src.app.infrastructure.clients.async_sql_client import AsyncSQLClient
+
+logger = setup_logging("WRITE BEHIND")
+
+# errors after which the rows are requeued; asyncpg raises OSError when it cannot connect
+FLUSH_ERRORS = (SQLAlchemyError, OSError)
+
+@dataclass(frozen=True)
+class WriteBehindLimits:
+    """
+    Flush triggers and capacity of a WriteBehindBuffer.
+
+    :param max_batch_rows: pending rows that trigger a flush before the interval elapses.
+    :param flush_interval_seconds: maximum time a row waits before it is flushed.
+    :param max_pending: pending rows at which put() waits for a flush.
+    """
+    max_batch_rows: int
+    flush_interval_seconds: float
+    max_pending: int
+
+@dataclass
+class _LoopState:
+    """Flush task and synchronisation primitives, bound to one event loop."""
+    loop: asyncio.AbstractEventLoop
+    flush_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    flush_due: asyncio.Event = field(default_factory=asyncio.Event)
+    space: asyncio.Condition = field(default_factory=asyncio.Condition)
+    task: asyncio.Task | None = None
+
+@dataclass(frozen=True)
+class PendingRow:
+    """One queued INSERT: the statement and the values of its row."""
+    query: str
+    values: dict
+
+class WriteBehindBuffer:
+    """
+    Batches INSERTs in the background, see the module docstring.
+
+    :param sql_client: client the batches are written with.
+    """
+    def __init__(self, sql_client: AsyncSQLClient, limits: WriteBehindLimits):
+        self.sql_client = sql_client
+        self.limits = limits
+        self._queue: deque[PendingRow] = deque()
+        self._flushing: list[PendingRow] = []
+        self._state: _LoopState | None = None
+        self._closing = False
+        WRITE_BEHIND_PENDING.set_function(lambda: len(self._queue) + len(self._flushing))
+
+    async def put(self, query: str, values: dict) -> None:
+        """Queue one row, waiting while the buffer is full; starts the flush task on first use."""
+        state = self._start()
+        if len(self._queue) >= self.limits.max_pending:
+            started = time.perf_counter()
+            state.flush_due.set()
+            async with state.space:
+                await state.space.wait_for(lambda: len(self._queue) < self.limits.max_pending)
+            WRITE_BEHIND_WAIT_SECONDS.observe(time.perf_counter() - started)
+        self._queue.append(PendingRow(query, values))
+        if len(self._queue) >= self.limits.max_batch_rows:
+            state.flush_due.set()
+
+    def pending(self, query: str, predicate: Callable[[dict], bool]) -> list[dict]:
+        """Return the values of not yet committed rows of query that match predicate, oldest first."""
+        return [row.values for row in (*self._flushing, *self._queue) if row.query == query and predicate(row.values)]
+
+    def _bind_loop(self) -> _LoopState:
+        """Return the loop state of the running event loop, replacing the state of a previous loop."""
+        loop = asyncio.get_running_loop()
+        if self._state is None or self._state.loop is not loop:
+            self._state = _LoopState(loop)
+        return self._state
+
+    def _start(self) -> _LoopState:
+        """Start the flush task on the running event loop unless it is running."""
+        state = self._bind_loop()
+        if state.task is None or state.task.done():
+            self._closing = False
+            state.task = state.loop.create_task(self._run(state))
+        return state
+
+    async def _run(self, state: _LoopState) -> None:
+        """Flush on the size trigger or when the interval elapses, until close()."""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(state.flush_due.wait(), timeout=self.limits.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            state.flush_due.clear()
+            try:
+                await self.flush()
+            except FLUSH_ERRORS:
+                pass  # already logged and requeued, retried on the next interval
+
+    async def flush(self) -> None:
+        """
+        Write every pending row. On a connection or server error the rows not yet written are
+        requeued and the error is raised; rows rejected by constraints are written one by one
+        and the failing ones dropped.
+        """
+        state = self._bind_loop()
+        async with state.flush_lock:
+            while self._queue:
+                size = min(len(self._queue), self.limits.max_batch_rows)
+                batch = self._flushing = [self._queue.popleft() for _ in range(size)]
+                async with state.space:
+                    state.space.notify_all()
+                try:
+                    await self._write_batch(batch)
+                except FLUSH_ERRORS as e:
+                    logger.error("Flushing %d rows failed, requeued: %s", len(batch), e)
+                    raise
+                finally:
+                    if batch:  # failed or cancelled, batch holds the rows not written
+                        WRITE_BEHIND_ROWS.labels(result="requeued").inc(len(batch))
+                        self._queue.extendleft(reversed(batch))
+                    self._flushing = []
+
+    async def _write_batch(self, rows: list[PendingRow]) -> None:
+        """Insert rows in one transaction, or one by one when the database rejects the batch; empties rows."""
+        try:
+            await self._write(rows)
+            rows.clear()
+        except (IntegrityError, DataError) as e:
+            logger.error("Batch of %d rows rejected (%s), writing them one by one.", len(rows), e)
+            await self._write_each(rows)
+
+    async def _write(self, rows: list[PendingRow]) -> None:
+        """Insert rows in one transaction, one batched INSERT per statement in first-queued order."""
+        batches: dict[str, list[dict]] = {}
+        for row in rows:
+            batches.setdefault(row.query, []).append(row.values)
+        async with self.sql_client.unit_of_work() as uow:
+            for query, values in batches.items():
+                await uow.insert(query, values)
+        WRITE_BEHIND_ROWS.labels(result="written").inc(len(rows))
+
+    async def _write_each(self, rows: list[PendingRow]) -> None:
+        """
+        Insert rows one per transaction, dropping (and logging) the ones the database rejects.
+        Each row is removed from rows once it is written or dropped, so on any other error
+        rows holds only the rows that were not written.
+        """
+        while rows:
+            row = rows[0]
+            try:
+                await self.sql_client.insert(row.query, row.values)
+                WRITE_BEHIND_ROWS.labels(result="written").inc()
+            except (IntegrityError, DataError) as e:
+                logger.error("Dropping rejected row %s: %s", row.values.get("id"), e)
+                WRITE_BEHIND_ROWS.labels(result="dropped").inc()
+            del rows[0]
+
+    async def close(self) -> None:
+        """Stop the flush task after its current flush and write everything still pending."""
+        state = self._bind_loop()
+        if state.task is not None:
+            self._closing = True
+            state.flush_due.set()
+            await state.task
+            state.task = None
+        try:
+            await self.flush()
+        except FLUSH_ERRORS:
+            logger.error("Shutting down with %d unwritten rows.", len(self._queue))
+            raise
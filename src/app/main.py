@@ -1,9 +1,14 @@
 """Main application file for the FRIA Agent and Services API."""
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from motor.motor_asyncio import AsyncIOMotorClient
 from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
+from src.app.core.database import async_engine
+from src.app.services.messages import write_behind
+from src.app.agent.fria_agent import history_window
 from src.app.apis.v1 import location_api, users_api, agent_api, audio_api, document_apis
 
 mongo_db_uri = settings.MONGODB_URI or ""
@@ -38,6 +43,11 @@ def health_startup():
     """Readiness check endpoint."""
     return {"status": "started"}
 
+@app.get("/metrics", tags=["Monitoring"])
+def metrics():
+    """Prometheus metrics: graph node, LLM, cache, SQL and checkpoint latencies and token counts."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.on_event("startup")
 async def startup_db_client():
     """Initialize MongoDB client on startup."""
@@ -46,12 +56,21 @@ async def startup_db_client():
     app.state.mongodb = app.state.mongodb_client.fria_document_db
     logger.info("Connected to MongoDB.")
 
+@app.on_event("startup")
+async def load_tokenizer():
+    """Load the chat history tokenizer in a worker thread, so startup does not wait for its download."""
+    asyncio.get_running_loop().run_in_executor(None, history_window.counter.load)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    """Close MongoDB client on shutdown."""
+    """Write pending messages and close the database clients on shutdown."""
+    await write_behind.close()
+    logger.info("Write-behind buffer drained.")
     logger.info("Closing MongoDB connection...")
     app.state.mongodb_client.close()
     logger.info("MongoDB connection closed.")
+    await async_engine.dispose()
+    logger.info("PostgreSQL async connection pool closed.")
 
 app.include_router(location_api.router, prefix="/api/v1")
 app.include_router(users_api.router, prefix="/api/v1")
@@ -1,15 +1,27 @@
 """
 Agent service module for initializing and managing the FRIA agent.
 """
+from typing import AsyncIterator
 from src.app.agent.fria_agent import friagent
+from src.app.agent.compact_state import towing_form
+from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
-from src.app.apis.deps import DBClientDep
+from src.app.apis.deps import AsyncDBClientDep
+from src.app.core.llm_usage import collect_usage
 from src.app.services.messages import add_message
+from src.app.services.llm_usage_service import add_llm_usage
 from src.app.apis.schemas.fria_agent_schema import AgentContinueSchema, AgentInitializeSchema
 
 logger = setup_logging("AGENT SERVICE")
 
-def initialize_agent(db: DBClientDep,
+async def save_turn_usage(db: AsyncDBClientDep, session_id, user_id, records: list[dict]) -> None:
+    """Persist the LLM usage of one turn; a failure is logged and does not fail the turn."""
+    try:
+        await add_llm_usage(db_client=db, session_id=session_id, user_id=user_id, records=records)
+    except Exception as e:
+        logger.error("Error saving LLM usage for session %s: %s", session_id, e)
+
+async def initialize_agent(db: AsyncDBClientDep,
         agent_initialize_data: AgentInitializeSchema
         ) -> dict:
     """Initialize the FRIA agent for a specific user."""
@@ -20,18 +32,21 @@ def initialize_agent(db: DBClientDep,
             }
         }
 
-        agent_state = friagent.invoke(
-            {
-                "agent_state": "initiate",
-                "mode": agent_initialize_data.mode,
-                "transcription": agent_initialize_data.recorded_transcription,
-                "vehicle_type": agent_initialize_data.vehicle_type,
-            },
-            config=thread_config
-        )
+        with collect_usage() as usage_records:
+            agent_state = await friagent.ainvoke(
+                {
+                    "agent_state": "initiate",
+                    "mode": agent_initialize_data.mode,
+                    "transcription": agent_initialize_data.recorded_transcription,
+                    "vehicle_type": agent_initialize_data.vehicle_type,
+                },
+                config=thread_config,
+                durability=settings.CHECKPOINT_DURABILITY,
+            )
+        await save_turn_usage(db, agent_initialize_data.session_id, agent_initialize_data.user_id, usage_records)
 
         if agent_initialize_data.mode == "chat" and agent_state["agent_query"]:
-            add_message(
+            await add_message(
                 db_client=db,
                 session_id=agent_initialize_data.session_id,
                 user_id=agent_initialize_data.user_id,
@@ -42,7 +57,7 @@ def initialize_agent(db: DBClientDep,
         return {
             "status": "success",
             "agent_query": agent_state["agent_query"],
-            "towing_form" : agent_state["towing_form"],
+            "towing_form" : towing_form(agent_state.get("form")),
             "message": "Agent initialized successfully.",
             "session_id": agent_initialize_data.session_id,
         }
@@ -55,8 +70,8 @@ def initialize_agent(db: DBClientDep,
             "session_id": agent_initialize_data.session_id,
         }
 
-def agent_continue(db: DBClientDep,
-                   agent_continue_data: AgentContinueSchema) -> dict:
+async def agent_continue(db: AsyncDBClientDep,
+                         agent_continue_data: AgentContinueSchema) -> dict:
     """Continue the FRIA agent interaction for a specific user."""
     try:
         thread_config = {
@@ -66,24 +81,27 @@ def agent_continue(db: DBClientDep,
         }
 
         if agent_continue_data.user_response:
-            add_message(
+            await add_message(
                 db_client=db,
                 session_id=agent_continue_data.session_id,
                 user_id=agent_continue_data.user_id,
                 role="user",
                 content=agent_continue_data.user_response
             )
-        agent_state = friagent.invoke(
-            {
-                "agent_state": "in_progress",
-                "vehicle_type": agent_continue_data.vehicle_type,
-                "user_response": agent_continue_data.user_response,
-            },
-            config=thread_config
-        )
+        with collect_usage() as usage_records:
+            agent_state = await friagent.ainvoke(
+                {
+                    "agent_state": "in_progress",
+                    "vehicle_type": agent_continue_data.vehicle_type,
+                    "user_response": agent_continue_data.user_response,
+                },
+                config=thread_config,
+                durability=settings.CHECKPOINT_DURABILITY,
+            )
+        await save_turn_usage(db, agent_continue_data.session_id, agent_continue_data.user_id, usage_records)
 
         if agent_state["agent_query"]:
-            add_message(
+            await add_message(
                 db_client=db,
                 session_id=agent_continue_data.session_id,
                 user_id=agent_continue_data.user_id,
@@ -94,7 +112,7 @@ def agent_continue(db: DBClientDep,
         return {
             "status": "success",
             "agent_query": agent_state["agent_query"],
-            "towing_form": agent_state["towing_form"],
+            "towing_form": towing_form(agent_state.get("form")),
             "message": "Agent continued successfully.",
             "session_id": agent_continue_data.session_id,
         }
@@ -106,3 +124,69 @@ def agent_continue(db: DBClientDep,
             "agent_state": None,
             "session_id": agent_continue_data.session_id,
         }
+
+async def agent_continue_stream(db: AsyncDBClientDep,
+                                agent_continue_data: AgentContinueSchema) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Continue the FRIA agent interaction, yielding ("token", ...) events while the next
+    question is generated and a final ("done", ...) or ("error", ...) event.
+    The agent question is persisted once the stream completes.
+    """
+    try:
+        thread_config = {
+            "configurable" : {
+                "thread_id" : agent_continue_data.session_id,
+                "stream_tokens": True,
+            }
+        }
+
+        if agent_continue_data.user_response:
+            await add_message(
+                db_client=db,
+                session_id=agent_continue_data.session_id,
+                user_id=agent_continue_data.user_id,
+                role="user",
+                content=agent_continue_data.user_response
+            )
+        agent_state = {}
+        with collect_usage() as usage_records:
+            async for stream_mode, chunk in friagent.astream(
+                {
+                    "agent_state": "in_progress",
+                    "vehicle_type": agent_continue_data.vehicle_type,
+                    "user_response": agent_continue_data.user_response,
+                },
+                config=thread_config,
+                stream_mode=["custom", "values"],
+                durability=settings.CHECKPOINT_DURABILITY,
+            ):
+                if stream_mode == "custom":
+                    yield "token", chunk
+                else:
+                    agent_state = chunk
+        await save_turn_usage(db, agent_continue_data.session_id, agent_continue_data.user_id, usage_records)
+
+        if agent_state.get("agent_query"):
+            await add_message(
+                db_client=db,
+                session_id=agent_continue_data.session_id,
+                user_id=agent_continue_data.user_id,
+                role="agent",
+                content=agent_state["agent_query"],
+            )
+
+        yield "done", {
+            "status": "success",
+            "agent_query": agent_state.get("agent_query"),
+            "towing_form": towing_form(agent_state.get("form")),
+            "message": "Agent continued successfully.",
+            "session_id": agent_continue_data.session_id,
+        }
+    except Exception as e:
+        logger.error("Error streaming agent for user %s and session %s: %s", agent_continue_data.user_id, agent_continue_data.session_id, e)
+        yield "error", {
+            "status": "error",
+            "message": str(e),
+            "agent_state": None,
+            "session_id": agent_continue_data.session_id,
+        }
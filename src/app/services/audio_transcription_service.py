@@ -4,10 +4,14 @@ import datetime
 import azure.cognitiveservices.speech as speechsdk
 from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
-from src.app.apis.deps import DBClientDep
+from src.app.apis.deps import AsyncDBClientDep
+from src.app.services.messages import write_behind
 
 logger = setup_logging("AUDIO TRANSCRIPTION SERVICE")
 
+INSERT_TRANSCRIPT = """INSERT INTO audio_transcripts (id, session_id, user_id, transcription_text, created_at)
+    VALUES (:id, :session_id, :user_id, :transcription_text, :created_at)"""
+
 SPEECH_KEY = settings.AZURE_SPEECH_KEY if hasattr(settings, "AZURE_SPEECH_KEY") else None
 SPEECH_REGION = settings.AZURE_SPEECH_REGION if hasattr(settings, "AZURE_SPEECH_REGION") else None
 
@@ -71,18 +75,18 @@ class AzureSpeechRecognizer:
         stop_future.get()
         logger.info("Continuous recognition stopped.")
 
-def add_audio_transcription(db_client: DBClientDep, session_id: str, user_id: str, transcription: str) -> None:
+async def add_audio_transcription(db_client: AsyncDBClientDep, session_id: str, user_id: str, transcription: str) -> None:
     """
-    Add an audio transcription message to the database.
+    Add an audio transcription message to the database, through the write-behind buffer when WRITE_BEHIND_ENABLED.
     """
     transcription_id = str(uuid.uuid4())
     recorded_at = datetime.datetime.now(datetime.timezone.utc)
-    db_client.insert(
-        query="""INSERT INTO audio_transcripts (id, session_id, user_id, transcription_text, created_at)
-        VALUES (:id, :session_id, :user_id, :transcription_text, :created_at)""",
-        values={"id": transcription_id,
-                "session_id": session_id,
-                "user_id": user_id,
-                "transcription_text": transcription,
-                "created_at": recorded_at}
-    )
+    values = {"id": transcription_id,
+              "session_id": session_id,
+              "user_id": user_id,
+              "transcription_text": transcription,
+              "created_at": recorded_at}
+    if settings.WRITE_BEHIND_ENABLED:
+        await write_behind.put(INSERT_TRANSCRIPT, values)
+        return
+    await db_client.insert(query=INSERT_TRANSCRIPT, values=values)
@@ -0,0 +1,108 @@
+"""
+Batch service module for running recorded call transcripts through the audio branch of the FRIA agent.
+"""
+import json
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Iterable
+from pydantic import ValidationError
+from src.app.agent.fria_agent import friagent
+from src.app.agent.compact_state import towing_form
+from src.app.core.config import settings
+from src.app.core.log_config import setup_logging
+from src.app.apis.deps import AsyncDBClientDep
+from src.app.core.llm_usage import collect_usage
+from src.app.services.agent_service import save_turn_usage
+from src.app.apis.schemas.fria_agent_schema import BatchTranscriptSchema
+
+logger = setup_logging("BATCH SERVICE")
+
+async def process_transcript(db: AsyncDBClientDep, transcript: BatchTranscriptSchema) -> dict:
+    """
+    Run one transcript through the audio branch of the agent, in its own session thread.
+    LLM usage is persisted when the transcript names its user and session: a generated
+    session_id has no sessions row for the llm_usage foreign key to reference.
+    """
+    with collect_usage() as usage_records:
+        agent_state = await friagent.ainvoke(
+            {
+                "agent_state": "initiate",
+                "mode": "audio",
+                "transcription": transcript.recorded_transcription,
+                "vehicle_type": transcript.vehicle_type,
+            },
+            config={"configurable": {"thread_id": transcript.session_id}},
+            durability=settings.CHECKPOINT_DURABILITY,
+        )
+    if transcript.user_id and "session_id" in transcript.model_fields_set:
+        await save_turn_usage(db, transcript.session_id, transcript.user_id, usage_records)
+    return {
+        "status": "success",
+        "human_sentiment": agent_state.get("human_sentiment"),
+        "agent_query": agent_state.get("agent_query"),
+        "towing_form": towing_form(agent_state.get("form")),
+        "validation_status": agent_state.get("validation_status"),
+        "session_id": transcript.session_id,
+    }
+
+async def process_line(db: AsyncDBClientDep, line_number: int, line: str) -> dict:
+    """Parse and process one JSONL line; any failure is returned as an error result for that line."""
+    item_id = None
+    try:
+        transcript = BatchTranscriptSchema.model_validate_json(line)
+        item_id = transcript.id
+        result = await process_transcript(db, transcript)
+    except ValidationError as e:
+        logger.error("Invalid batch line %d: %s", line_number, e)
+        result = {"status": "error", "message": f"Invalid transcript: {e.errors(include_url=False)}"}
+        try:
+            item_id = json.loads(line).get("id")
+        except (ValueError, AttributeError):
+            pass
+    except Exception as e:
+        logger.error("Error processing batch line %d: %s", line_number, e)
+        result = {"status": "error", "message": str(e)}
+    return {"line": line_number, "id": item_id, **result}
+
+async def _lines_of(lines: Iterable[str]) -> AsyncIterator[str]:
+    """Yield the lines of a synchronous iterable, e.g. an open file."""
+    for line in lines:
+        yield line
+
+async def _next_line(lines: AsyncIterator[str]) -> str | None:
+    """Return the next line, or None at the end of the input."""
+    try:
+        return await anext(lines)
+    except StopAsyncIteration:
+        return None
+
+async def run_batch(db: AsyncDBClientDep, lines: Iterable[str] | AsyncIterable[str], concurrency: int) -> AsyncIterator[dict]:
+    """
+    Process JSONL transcript lines with at most concurrency in flight, yielding each
+    result as soon as it finishes (not in input order). Lines are read as they arrive
+    and only while a worker is free, so the input is never held in memory. Blank
+    lines are skipped. Results carry the 1-based line number and the transcript id, if any.
+    """
+    source = aiter(lines) if isinstance(lines, AsyncIterable) else _lines_of(lines)
+    reader, workers, line_number = None, set(), 0
+    try:
+        while True:
+            if reader is None and source is not None and len(workers) < concurrency:
+                reader = asyncio.ensure_future(_next_line(source))
+            if reader is None and not workers:
+                break
+            done, _ = await asyncio.wait({reader, *workers} - {None}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not reader:
+                    workers.discard(task)
+                    yield task.result()
+                    continue
+                reader, line = None, task.result()
+                if line is None:
+                    source = None
+                    continue
+                line_number += 1
+                if line.strip():
+                    workers.add(asyncio.ensure_future(process_line(db, line_number, line)))
+    finally:
+        for task in {reader, *workers} - {None}:
+            task.cancel()
@@ -4,7 +4,7 @@ import datetime
 from typing import Optional, List, Dict
 import requests
 from geopy.geocoders import Nominatim
-from src.app.apis.deps import DBClientDep
+from src.app.apis.deps import AsyncDBClientDep
 from src.app.core.log_config import setup_logging
 from src.app.apis.schemas.location_routers_schema import InsertGPSLocationRequest
 
@@ -65,21 +65,21 @@ def auto_detect_location() -> dict:
     except Exception:
         return {}
 
-def insert_gps_location(
+async def insert_gps_location(
     gps_location_request: InsertGPSLocationRequest,
-    db_client: DBClientDep
+    db_client: AsyncDBClientDep
 ):
     """Insert GPS location into the database."""
-    status = db_client.insert(
-        query="""INSERT INTO gps_locations (id, user_id, session_id, address, latitude, longitude, created_at)
+    status = await db_client.insert(
+        query="""INSERT INTO geo_locations (id, user_id, session_id, address, latitude, longitude, created_at)
         VALUES (:id, :user_id, :session_id, :address, :latitude, :longitude, :created_at)""",
         values={
             "id": str(uuid.uuid4()),
             "user_id": gps_location_request.user_id,
             "session_id": gps_location_request.session_id,
             "address": gps_location_request.address,
-            "latitude": gps_location_request.latitude,
-            "longitude": gps_location_request.longitude,
+            "latitude": str(gps_location_request.latitude),  # String columns in the model
+            "longitude": str(gps_location_request.longitude),
             "created_at": datetime.datetime.now(datetime.timezone.utc)
         }
     )
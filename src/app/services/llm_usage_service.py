@@ -0,0 +1,99 @@
+"""LLM usage service module for persisting and reporting per-session token spend."""
+import datetime
+from src.app.apis.deps import AsyncDBClientDep
+from src.app.core.config import settings
+from src.app.core.log_config import setup_logging
+from src.app.services.messages import write_behind
+
+logger = setup_logging("LLM USAGE SERVICE")
+
+USAGE_COLUMNS = """
+    COUNT(*) AS calls,
+    COALESCE(SUM(CASE WHEN cached THEN 1 ELSE 0 END), 0) AS cached_calls,
+    COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens,
+    COALESCE(SUM(completion_tokens), 0) AS completion_tokens,
+    COALESCE(ROUND(AVG(CASE WHEN cached THEN NULL ELSE latency_ms END)), 0) AS avg_latency_ms
+"""
+SELECT_SESSION_USAGE = f"SELECT {USAGE_COLUMNS} FROM llm_usage WHERE session_id=:session_id"
+INSERT_LLM_USAGE = """INSERT INTO llm_usage (id, session_id, user_id, node, template, prompt_tokens, completion_tokens, latency_ms, cached, created_at)
+    VALUES (:id, :session_id, :user_id, :node, :template, :prompt_tokens, :completion_tokens, :latency_ms, :cached, :created_at)"""
+
+async def add_llm_usage(db_client: AsyncDBClientDep, session_id: str, user_id: str, records: list[dict]) -> None:
+    """
+    Add the usage records of one agent turn in the database, through the write-behind buffer when WRITE_BEHIND_ENABLED.
+    """
+    if not records:
+        return
+    created_at = datetime.datetime.now(datetime.timezone.utc)
+    values = [{**record, "session_id": session_id, "user_id": user_id, "created_at": created_at} for record in records]
+    if settings.WRITE_BEHIND_ENABLED:
+        for row in values:
+            await write_behind.put(INSERT_LLM_USAGE, row)
+        return
+    await db_client.insert(query=INSERT_LLM_USAGE, values=values)
+
+async def _flush_pending(predicate) -> None:
+    """Write the buffered usage rows first when any matches predicate, so reports include the latest turns."""
+    if write_behind.pending(INSERT_LLM_USAGE, predicate):
+        await write_behind.flush()
+
+def _with_cost(row) -> dict:
+    """Return a usage row as a dict with total tokens and cost."""
+    usage = row._asdict()
+    for column in ("calls", "cached_calls", "prompt_tokens", "completion_tokens", "avg_latency_ms"):
+        usage[column] = int(usage[column])
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    usage["cost"] = round(
+        usage["prompt_tokens"] / 1000 * settings.LLM_PROMPT_COST_PER_1K_TOKENS
+        + usage["completion_tokens"] / 1000 * settings.LLM_COMPLETION_COST_PER_1K_TOKENS, 6)
+    return usage
+
+async def fetch_usage_by_session_id(db_client: AsyncDBClientDep, session_id: str) -> dict:
+    """
+    Fetch the token spend of a session, in total and per graph node and prompt template.
+    """
+    await _flush_pending(lambda row: str(row["session_id"]) == str(session_id))
+    total = await db_client.fetch_all(
+        query=SELECT_SESSION_USAGE,
+        params={"session_id": session_id},
+        as_dict=False
+    )
+    breakdown = await db_client.fetch_all(
+        query=f"""SELECT node, template, {USAGE_COLUMNS} FROM llm_usage WHERE session_id=:session_id
+                  GROUP BY node, template ORDER BY SUM(prompt_tokens + completion_tokens) DESC""",
+        params={"session_id": session_id},
+        as_dict=False
+    )
+    return {
+        "session_id": session_id,
+        "total": _with_cost(total[0]),
+        "by_node": [_with_cost(row) for row in breakdown],
+    }
+
+async def fetch_usage_summary(db_client: AsyncDBClientDep, top_sessions: int = 10) -> dict:
+    """
+    Fetch the aggregate token spend over all sessions, per prompt template and the most expensive sessions.
+    """
+    await _flush_pending(lambda row: True)
+    total = await db_client.fetch_all(
+        query=f"SELECT COUNT(DISTINCT session_id) AS sessions, {USAGE_COLUMNS} FROM llm_usage",
+        as_dict=False
+    )
+    by_template = await db_client.fetch_all(
+        query=f"""SELECT template, {USAGE_COLUMNS} FROM llm_usage
+                  GROUP BY template ORDER BY SUM(prompt_tokens + completion_tokens) DESC""",
+        as_dict=False
+    )
+    sessions = await db_client.fetch_all(
+        query=f"""SELECT session_id, {USAGE_COLUMNS} FROM llm_usage
+                  GROUP BY session_id ORDER BY SUM(prompt_tokens + completion_tokens) DESC LIMIT :limit""",
+        params={"limit": top_sessions},
+        as_dict=False
+    )
+    summary = _with_cost(total[0])
+    summary["sessions"] = int(total[0].sessions)
+    return {
+        "total": summary,
+        "by_template": [_with_cost(row) for row in by_template],
+        "top_sessions": [_with_cost(row) for row in sessions],
+    }
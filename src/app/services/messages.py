@@ -1,28 +1,143 @@
 """Messages service module."""
 import uuid
+import base64
 import datetime
-from src.app.apis.deps import DBClientDep
+from typing import AsyncIterator
+from src.app.apis.deps import AsyncDBClientDep
+from src.app.core.config import settings
 from src.app.core.log_config import setup_logging
+from src.app.infrastructure.clients.async_sql_client import AsyncSQLClient
+from src.app.infrastructure.db.write_behind import WriteBehindBuffer, WriteBehindLimits
 
 logger = setup_logging("MESSAGES SERVICE")
 
-def add_message(db_client: DBClientDep, session_id: str, user_id: str, role: str, content: str) -> None:
+INSERT_MESSAGE = """INSERT INTO messages (id, session_id, user_id, role, content, created_at)
+    VALUES (:id, :session_id, :user_id, :role, :content, :created_at)"""
+SELECT_MESSAGES = """SELECT id, role, content, created_at FROM messages WHERE session_id=:session_id
+    ORDER BY created_at, id"""
+SELECT_MESSAGES_SINCE = """SELECT id, role, content, created_at FROM messages WHERE session_id=:session_id
+    AND (created_at, id) > (:after_created_at, :after_id)
+    ORDER BY created_at, id"""
+SELECT_MESSAGES_PAGE = SELECT_MESSAGES + " LIMIT :limit"
+SELECT_MESSAGES_AFTER = SELECT_MESSAGES_SINCE + " LIMIT :limit"
+
+write_behind = WriteBehindBuffer(
+    AsyncSQLClient(),
+    WriteBehindLimits(
+        max_batch_rows=settings.WRITE_BEHIND_BATCH_SIZE,
+        flush_interval_seconds=settings.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+        max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    ),
+)
+
+async def add_message(db_client: AsyncDBClientDep, session_id: str, user_id: str, role: str, content: str) -> None:
     """
-    add a message in the database.
+    add a message in the database, through the write-behind buffer when WRITE_BEHIND_ENABLED.
     """
     message_id = str(uuid.uuid4())
     created_at = datetime.datetime.now(datetime.timezone.utc)
-    db_client.insert(
-        query="INSERT INTO messages (id, session_id, user_id, role, content, created_at) VALUES (:id, :session_id, :user_id, :role, :content, :created_at)",
-        values={"id": message_id, "session_id": session_id, "user_id": user_id, "role": role, "content": content, "created_at": created_at}
+    values = {"id": message_id, "session_id": session_id, "user_id": user_id, "role": role, "content": content, "created_at": created_at}
+    if settings.WRITE_BEHIND_ENABLED:
+        await write_behind.put(INSERT_MESSAGE, values)
+        return
+    await db_client.insert(query=INSERT_MESSAGE, values=values)
+
+class InvalidCursorError(ValueError):
+    """Raised when an after cursor is not one returned with a page of messages."""
+
+def _utc_naive(value: datetime.datetime) -> datetime.datetime:
+    """Return value as naive UTC, as created_at is stored."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+def _position(message: dict) -> tuple[datetime.datetime, uuid.UUID]:
+    """Return the (created_at, id) keyset position of message."""
+    return message["created_at"], uuid.UUID(message["id"])
+
+def encode_cursor(message: dict) -> str:
+    """Return the opaque cursor of the position after message."""
+    created_at, message_id = _position(message)
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{message_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    """
+    Return the (created_at, id) position of cursor.
+
+    :raises InvalidCursorError: if cursor was not made by encode_cursor.
+    """
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(message_id)
+    except ValueError as e:  # also binascii.Error and UnicodeDecodeError
+        raise InvalidCursorError(f"invalid cursor: {cursor!r}") from e
+
+def _pending_messages(session_id: str, position: tuple | None) -> list[dict]:
+    """Return the messages of a session still in the write-behind buffer after position, in order."""
+    pending = (
+        {"id": str(row["id"]), "role": row["role"], "content": row["content"], "created_at": _utc_naive(row["created_at"])}
+        for row in write_behind.pending(INSERT_MESSAGE, lambda row: str(row["session_id"]) == str(session_id))
     )
+    return sorted((m for m in pending if position is None or _position(m) > position), key=_position)
+
+def _message(row) -> dict:
+    """Return a messages row as a message dictionary."""
+    return {"id": str(row["id"]), "role": row["role"], "content": row["content"], "created_at": row["created_at"]}
 
-def fetch_messages_by_session_id(db_client: DBClientDep, session_id: str) -> list:
+async def fetch_messages_page(db_client: AsyncDBClientDep, session_id: str, limit: int, after: str | None = None) -> dict:
     """
-    Fetch messages from the database by session ID.
+    Fetch up to limit messages of a session in (created_at, id) order, after the cursor
+    position if given, including the ones still in the write-behind buffer.
+
+    :return: messages (id, role, content, created_at), has_more, and next_cursor to pass as
+        after for the next page, or later for the messages added since (after itself if the page is empty).
+    :raises InvalidCursorError: if after is not a cursor returned by this function.
     """
-    messages = db_client.fetch_all(
-        query="SELECT role, content FROM messages WHERE session_id=:session_id ORDER BY created_at ASC",
-        params={"session_id": session_id}
+    position = decode_cursor(after) if after else None
+    pending = _pending_messages(session_id, position)
+    params = {"session_id": session_id, "limit": limit + 1}
+    if position:
+        params.update(after_created_at=position[0], after_id=position[1])
+    rows = await db_client.fetch_all(
+        query=SELECT_MESSAGES_AFTER if position else SELECT_MESSAGES_PAGE,
+        params=params,
+        as_dict=False
     )
-    return messages
+    merged = {message["id"]: message for message in pending}
+    merged.update((str(row.id), _message(row._asdict())) for row in rows)
+    messages = sorted((m for m in merged.values() if position is None or _position(m) > position), key=_position)
+    page = messages[:limit]
+    return {
+        "messages": page,
+        "has_more": len(messages) > limit,
+        "next_cursor": encode_cursor(page[-1]) if page else after,
+    }
+
+async def stream_messages(db_client: AsyncDBClientDep, session_id: str, batch_size: int,
+                          after: str | None = None) -> AsyncIterator[dict]:
+    """
+    Yield the messages of a session after the cursor position, read through a server-side
+    cursor batch_size rows at a time, so memory does not grow with the session, and merged
+    with the ones still in the write-behind buffer. Each message carries its cursor.
+
+    :raises InvalidCursorError: if after is not a cursor returned by fetch_messages_page.
+    """
+    position = decode_cursor(after) if after else None
+    pending = _pending_messages(session_id, position)
+    pending_ids = {message["id"] for message in pending}
+    params = {"session_id": session_id}
+    if position:
+        params.update(after_created_at=position[0], after_id=position[1])
+    async for row in db_client.stream(SELECT_MESSAGES_SINCE if position else SELECT_MESSAGES, params, batch_size):
+        message = _message(row)
+        if message["id"] in pending_ids:  # flushed while streaming: sent from the buffered copy
+            continue
+        while pending and _position(pending[0]) < _position(message):
+            yield _with_cursor(pending.pop(0))
+        yield _with_cursor(message)
+    for message in pending:
+        yield _with_cursor(message)
+
+def _with_cursor(message: dict) -> dict:
+    """Return message with its cursor."""
+    return {**message, "cursor": encode_cursor(message)}
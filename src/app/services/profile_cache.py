@@ -0,0 +1,110 @@
+"""
+Read-through cache for the user, vehicle and insurance profile lookups.
+
+Profile rows are reference data that does not change during an incident
+session, so each lookup function keeps its results in its own TTL+LRU cache,
+keyed by its arguments after the database client. Misses ("not found") are
+cached too, for the shorter PROFILE_CACHE_NEGATIVE_TTL_SECONDS, and concurrent
+misses on one key share a single query.
+
+The cache is per worker process: code that writes profile rows must call
+invalidate() on the affected lookups (or invalidate_profiles()); other workers
+see the change when their entries expire after PROFILE_CACHE_TTL_SECONDS.
+"""
+import copy
+import functools
+from typing import Any, Awaitable, Callable
+from src.app.core.config import settings
+from src.app.core.ttl_cache import TTLCache
+from src.app.core.metrics import PROFILE_CACHE_LOOKUPS
+from src.app.infrastructure.clients.single_flight import SingleFlight
+
+_NOT_FOUND = object()  # cached marker of a lookup that found no row
+_MISSING = object()
+
+class ReadThroughCache:
+    """
+    Cache of one async lookup function, see the module docstring.
+
+    :param name: name of the lookup in stats and metrics.
+    :param fetch: the lookup, called as fetch(db_client, *key) on a miss.
+    """
+    def __init__(self, name: str, fetch: Callable[..., Awaitable[Any]]):
+        self.name = name
+        self.fetch = fetch
+        self.entries = TTLCache(max_entries=settings.PROFILE_CACHE_MAX_ENTRIES, ttl_seconds=settings.PROFILE_CACHE_TTL_SECONDS)
+        self.single_flight = SingleFlight()
+        self.counters = {"hits": 0, "negative_hits": 0, "misses": 0}
+        self._generation = 0  # bumped by invalidation so that in-flight misses do not store stale rows
+
+    async def get(self, db_client, *key) -> Any:
+        """Return the cached result for key, or fetch, cache and return it."""
+        value = self.entries.get(key, _MISSING)
+        if value is _NOT_FOUND:
+            self._count("negative_hits")
+            return None
+        if value is not _MISSING:
+            self._count("hits")
+            return copy.copy(value)
+        self._count("misses")
+        _, value = await self.single_flight.do(repr(key), lambda: self._load(db_client, key))
+        return copy.copy(value)
+
+    async def _load(self, db_client, key: tuple) -> Any:
+        """Fetch key from the database and cache the result unless it was invalidated meanwhile."""
+        generation = self._generation
+        value = await self.fetch(db_client, *key)
+        if generation == self._generation:
+            if value is not None:
+                self.entries.set(key, value)
+            else:
+                self.entries.set(key, _NOT_FOUND, ttl_seconds=settings.PROFILE_CACHE_NEGATIVE_TTL_SECONDS)
+        return value
+
+    def _count(self, result: str) -> None:
+        self.counters[result] += 1
+        PROFILE_CACHE_LOOKUPS.labels(lookup=self.name, result=result).inc()
+
+    def invalidate(self, *key) -> None:
+        """Drop the entry of key, e.g. after the row it was read from is written."""
+        self._generation += 1
+        self.entries.delete(key)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._generation += 1
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        """Return entries, hit/miss counters and hit ratio (negative hits count as hits)."""
+        lookups = sum(self.counters.values())
+        hits = self.counters["hits"] + self.counters["negative_hits"]
+        return {"entries": len(self.entries), **self.counters, "hit_ratio": hits / lookups if lookups else 0.0}
+
+PROFILE_CACHES: dict[str, ReadThroughCache] = {}
+
+def read_through(func: Callable[..., Awaitable[Any]]):
+    """
+    Decorator caching an async lookup func(db_client, *key) with PROFILE_CACHE_* settings.
+    The wrapper has the cache as .cache, and its invalidate(*key) and clear() methods.
+    """
+    cache = PROFILE_CACHES[func.__name__] = ReadThroughCache(func.__name__, func)
+
+    @functools.wraps(func)
+    async def wrapper(db_client, *key):
+        if not settings.PROFILE_CACHE_ENABLED:
+            return await func(db_client, *key)
+        return await cache.get(db_client, *key)
+    wrapper.cache = cache
+    wrapper.invalidate = cache.invalidate
+    wrapper.clear = cache.clear
+    return wrapper
+
+def invalidate_profiles() -> None:
+    """Drop every cached profile lookup of this worker."""
+    for cache in PROFILE_CACHES.values():
+        cache.clear()
+
+def profile_cache_stats() -> dict:
+    """Return the stats of every profile lookup cache by lookup name."""
+    return {name: cache.stats() for name, cache in PROFILE_CACHES.items()}
@@ -1,61 +1,87 @@
 """user service module for handling user-related database operations."""
 import uuid
 import datetime
-from src.app.apis.deps import DBClientDep
+from src.app.apis.deps import AsyncDBClientDep
 from src.app.core.log_config import setup_logging
+from src.app.services.profile_cache import read_through
 
 logger = setup_logging("USER SERVICE")
 
-def fetch_user_by_name(db_client: DBClientDep, user_name: str) -> dict:
+SELECT_USER_BY_NAME = "SELECT * FROM user_profiles WHERE name=:user_name"
+SELECT_VEHICLE_BY_USER_ID = "SELECT * FROM vehicle_info WHERE user_id=:user_id"
+SELECT_INSURANCE_BY_USER_ID = "SELECT * FROM insurance_policy_details WHERE user_id=:user_id"
+SELECT_INSURANCE_BY_VEHICLE_ID = "SELECT * FROM insurance_policy_details WHERE vehicle_id=:vehicle_id"
+SELECT_SESSION_BY_USER_VEHICLE = "SELECT id FROM sessions WHERE user_id=:user_id AND vehicle_id=:vehicle_id"
+INSERT_SESSION = """INSERT INTO sessions (id, user_id, vehicle_id, user_name, started_at)
+    VALUES (:id, :user_id, :vehicle_id, :user_name, :started_at) RETURNING id"""
+
+# The user (first match by name), each of their vehicles with its latest policy and latest session.
+SELECT_BOOTSTRAP = """WITH u AS (SELECT * FROM user_profiles WHERE name=:user_name LIMIT 1)
+    SELECT to_jsonb(u) AS user_info, to_jsonb(v) AS vehicle_info, to_jsonb(i) AS insurance_info, s.id AS session_id
+    FROM u
+    LEFT JOIN vehicle_info v ON v.user_id = u.id
+    LEFT JOIN LATERAL (
+        SELECT * FROM insurance_policy_details WHERE vehicle_id = v.id ORDER BY policy_end_date DESC LIMIT 1
+    ) i ON true
+    LEFT JOIN LATERAL (
+        SELECT id FROM sessions WHERE user_id = u.id AND vehicle_id = v.id ORDER BY started_at DESC LIMIT 1
+    ) s ON true
+    ORDER BY v.id"""
+
+@read_through
+async def fetch_user_by_name(db_client: AsyncDBClientDep, user_name: str) -> dict:
     """
     Fetch user details from the database by user name.
     """
-    user_info = db_client.fetch_one(
-        query="SELECT * FROM user_profiles WHERE name=:user_name",
+    user_info = await db_client.fetch_one(
+        query=SELECT_USER_BY_NAME,
         params={"user_name": user_name}
     )
 
     return user_info
 
-def fetch_vehicle_by_user_id(db_client: DBClientDep, user_id: str) -> dict:
+@read_through
+async def fetch_vehicle_by_user_id(db_client: AsyncDBClientDep, user_id: str) -> dict:
     """
     Fetch vehicle details from the database by user ID.
     """
-    vehicle_info = db_client.fetch_one(
-        query="SELECT * FROM vehicle_info WHERE user_id=:user_id",
+    vehicle_info = await db_client.fetch_one(
+        query=SELECT_VEHICLE_BY_USER_ID,
         params={"user_id": user_id}
     )
 
     return vehicle_info
 
-def fetch_insurance_details_by_user_id(db_client: DBClientDep, user_id: str, ) -> dict:
+@read_through
+async def fetch_insurance_details_by_user_id(db_client: AsyncDBClientDep, user_id: str, ) -> dict:
     """
     Fetch insurance details from the database by user ID.
     """
-    insurance_info = db_client.fetch_one(
-        query="SELECT * FROM insurance_policy_details WHERE user_id=:user_id",
+    insurance_info = await db_client.fetch_one(
+        query=SELECT_INSURANCE_BY_USER_ID,
         params={"user_id": user_id}
     )
 
     return insurance_info
 
-def fetch_insurance_details_by_vehicle_id(db_client: DBClientDep, vehicle_id: str) -> dict:
+@read_through
+async def fetch_insurance_details_by_vehicle_id(db_client: AsyncDBClientDep, vehicle_id: str) -> dict:
     """
     Fetch insurance details from the database by vehicle ID.
     """
-    insurance_info = db_client.fetch_one(
-        query="SELECT * FROM insurance_policy_details WHERE vehicle_id=:vehicle_id",
+    insurance_info = await db_client.fetch_one(
+        query=SELECT_INSURANCE_BY_VEHICLE_ID,
         params={"vehicle_id": vehicle_id}
     )
 
     return insurance_info
 
-def fetch_session_id_by_user_vechicle_id(db_client: DBClientDep, user_id: str, vehicle_id: str) -> str:
+async def fetch_session_id_by_user_vechicle_id(db_client: AsyncDBClientDep, user_id: str, vehicle_id: str) -> str:
     """
     Fetch session ID from the database by user ID.
     """
-    session_info = db_client.fetch_one(
-        query="SELECT id FROM sessions WHERE user_id=:user_id AND vehicle_id=:vehicle_id",
+    session_info = await db_client.fetch_one(
+        query=SELECT_SESSION_BY_USER_VEHICLE,
         params={"user_id": user_id, "vehicle_id": vehicle_id}
     )
 
@@ -64,15 +90,52 @@ def fetch_session_id_by_user_vechicle_id(db_client: DBClientDep, user_id: str, v
 
     return {"session_id": session_info["id"]}
 
-def create_session_id(db_client: DBClientDep, user_id: str, vehicle_id: str, user_name: str) -> str:
+async def create_session_id(db_client: AsyncDBClientDep, user_id: str, vehicle_id: str, user_name: str) -> str:
     """
     Create a new session ID for the user.
     """
-    generated_session_id = str(uuid.uuid4())
-    time = datetime.datetime.now(datetime.timezone.utc)
-    session_id = db_client.insert_returning_id(
-        query="INSERT INTO sessions (id, user_id, vehicle_id, user_name, started_at) VALUES (:id, :user_id, :vehicle_id, :user_name, :started_at) RETURNING id",
-        values={"id": generated_session_id, "user_id": user_id, "vehicle_id": vehicle_id, "user_name": user_name, "started_at": time}
+    session_id = await db_client.insert_returning_id(
+        query=INSERT_SESSION,
+        values=_new_session(user_id, vehicle_id, user_name)
     )
 
     return session_id
+
+def _new_session(user_id: str, vehicle_id: str, user_name: str) -> dict:
+    """Return the INSERT_SESSION values of a new session."""
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "vehicle_id": vehicle_id,
+        "user_name": user_name,
+        "started_at": datetime.datetime.now(datetime.timezone.utc),
+    }
+
+async def bootstrap_session(db_client: AsyncDBClientDep, user_name: str, vehicle_id: str | None = None) -> dict | None:
+    """
+    Resolve a user, their vehicles with insurance, and the latest session of one vehicle
+    (created if there is none) with one query, in one transaction.
+
+    :param vehicle_id: vehicle of the session; defaults to the user's first vehicle.
+    :return: None if there is no such user; vehicle_id and session_id are None if the user has no
+        vehicle (or not the requested one).
+    """
+    async with db_client.unit_of_work() as uow:
+        rows = await uow.fetch_all(SELECT_BOOTSTRAP, {"user_name": user_name}, as_dict=False)
+        if not rows:
+            return None
+        user_info = rows[0].user_info
+        vehicles = [row for row in rows if row.vehicle_info is not None]
+        selected = next((row for row in vehicles if vehicle_id in (None, row.vehicle_info["id"])), None)
+        session_id, session_created = selected.session_id if selected else None, False
+        if selected and session_id is None:
+            session_id = await uow.insert_returning_id(
+                INSERT_SESSION, _new_session(user_info["id"], selected.vehicle_info["id"], user_info["name"]))
+            session_created = True
+    return {
+        "user_info": user_info,
+        "vehicles": [{"vehicle_info": row.vehicle_info, "insurance_info": row.insurance_info} for row in vehicles],
+        "vehicle_id": selected.vehicle_info["id"] if selected else None,
+        "session_id": str(session_id) if session_id else None,
+        "session_created": session_created,
+    }
@@ -0,0 +1,14 @@
+"""
+Offline benchmarks for the FRIA agent.
+
+Benchmarks never talk to Azure: placeholder credentials are set here, before
+any application module reads its settings, and the LLM is replaced by a stub.
+"""
+import os
+
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("ENDPOINT", "https://offline-benchmark.invalid")
+os.environ.setdefault("API_VERSION", "2024-10-21")
+os.environ.setdefault("DEPLOYMENT_NAME", "offline-benchmark")
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://offline-benchmark@localhost/fria")
+os.environ.setdefault("CHECKPOINT_BACKEND", "memory")
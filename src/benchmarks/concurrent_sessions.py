@@ -0,0 +1,92 @@
+"""
+Benchmark concurrent agent sessions against a stubbed LLM.
+
+Compares the legacy execution model (sync routes: every turn occupies a
+threadpool worker and runs on its own event loop) with the async-native path
+(async routes awaiting friagent.ainvoke on the server loop).
+
+Run from the project root:
+    python -m src.benchmarks.concurrent_sessions --sessions 200 --latency 0.5
+"""
+import io
+import time
+import uuid
+import logging
+import contextlib
+import asyncio
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from src.benchmarks.stub_llm import StubLLMClient
+from src.app.agent import fria_agent
+
+DEFAULT_THREADPOOL_SIZE = 40  # anyio's default worker limit used by FastAPI for sync routes
+
+def session_turns(session_id: str) -> list[tuple[dict, dict]]:
+    """Return the (input, config) pairs of one chat session: initialize plus one answer."""
+    config = {"configurable": {"thread_id": session_id}}
+    return [
+        ({"agent_state": "initiate", "mode": "chat"}, config),
+        ({"agent_state": "in_progress", "user_response": "My car stopped on the highway."}, config),
+    ]
+
+def _legacy_turn(turn_input: dict, config: dict) -> None:
+    """Run one turn the way the sync routes did: blocking a worker thread on a private event loop."""
+    asyncio.run(fria_agent.friagent.ainvoke(turn_input, config=config))
+
+async def run_legacy(sessions: int, threadpool_size: int) -> list[float]:
+    """Drive all sessions through a bounded threadpool, as sync FastAPI routes would."""
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=threadpool_size) as pool:
+        async def run_session() -> list[float]:
+            latencies = []
+            for turn_input, config in session_turns(str(uuid.uuid4())):
+                started = time.perf_counter()  # includes the wait for a free worker
+                await loop.run_in_executor(pool, _legacy_turn, turn_input, config)
+                latencies.append(time.perf_counter() - started)
+            return latencies
+        results = await asyncio.gather(*(run_session() for _ in range(sessions)))
+    return [latency for session in results for latency in session]
+
+async def run_async(sessions: int) -> list[float]:
+    """Drive all sessions concurrently on a single event loop with friagent.ainvoke."""
+    async def run_session() -> list[float]:
+        latencies = []
+        for turn_input, config in session_turns(str(uuid.uuid4())):
+            started = time.perf_counter()
+            await fria_agent.friagent.ainvoke(turn_input, config=config)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+    results = await asyncio.gather(*(run_session() for _ in range(sessions)))
+    return [latency for session in results for latency in session]
+
+def report(name: str, sessions: int, elapsed: float, latencies: list[float]) -> None:
+    """Print throughput and turn latency percentiles for one run."""
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<8} sessions={sessions} wall={elapsed:.2f}s "
+          f"sessions/s={sessions / elapsed:.1f} "
+          f"turn p50={quantiles[49]:.3f}s p95={quantiles[94]:.3f}s max={max(latencies):.3f}s")
+
+async def main(args: argparse.Namespace) -> None:
+    """Run both execution models against the same stub and print a comparison."""
+    logging.disable(logging.INFO)
+    fria_agent.llm = StubLLMClient(latency=args.latency)
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the graph nodes print debug output
+        started = time.perf_counter()
+        legacy_latencies = await run_legacy(args.sessions, args.threadpool)
+        legacy_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        async_latencies = await run_async(args.sessions)
+        async_elapsed = time.perf_counter() - started
+
+    report("legacy", args.sessions, legacy_elapsed, legacy_latencies)
+    report("async", args.sessions, async_elapsed, async_latencies)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200, help="number of concurrent chat sessions")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency per call in seconds")
+    parser.add_argument("--threadpool", type=int, default=DEFAULT_THREADPOOL_SIZE, help="worker threads for the legacy path")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,170 @@
+"""
+Replay recorded sessions through the FRIA agent graph against a stubbed LLM.
+
+Every session of the fixture file (an initialize turn plus its recorded chat
+answers) is replayed turn by turn. Reports per-node latency percentiles, graph
+overhead per turn (wall time not spent inside a node), checkpoint size after
+each turn, bytes written to the checkpointer per turn and session throughput.
+Runs offline.
+
+Run from the project root:
+    python -m src.benchmarks.replay --repeat 40 --concurrency 20 --latency 0.3
+"""
+import io
+import os
+import json
+import time
+import uuid
+import logging
+import asyncio
+import argparse
+import contextlib
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+from src.benchmarks.stub_llm import StubLLMClient
+from src.app.agent import fria_agent
+
+FIXTURE_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "recorded_sessions.json")
+
+@dataclass
+class ReplayStats:
+    """Measurements collected while replaying sessions."""
+    node_latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    turn_latencies: list[float] = field(default_factory=list)
+    turn_overheads: list[float] = field(default_factory=list)
+    checkpoint_sizes: dict[int, list[int]] = field(default_factory=lambda: defaultdict(list))
+    bytes_written: dict[int, list[int]] = field(default_factory=lambda: defaultdict(list))
+
+def load_sessions(path: str) -> list[dict]:
+    """Load the recorded sessions from a fixture file."""
+    with open(path, encoding="utf-8") as fixture:
+        return json.load(fixture)["sessions"]
+
+def session_inputs(session: dict) -> list[dict]:
+    """Return the graph inputs of a recorded session: initialize, then one input per chat answer."""
+    inputs = [{
+        "agent_state": "initiate",
+        "mode": session["mode"],
+        "transcription": session.get("transcription"),
+        "vehicle_type": session.get("vehicle_type"),
+    }]
+    inputs += [
+        {"agent_state": "in_progress", "vehicle_type": session.get("vehicle_type"), "user_response": answer}
+        for answer in session["turns"]
+    ]
+    return inputs
+
+def covered_time(intervals: list[tuple[float, float]]) -> float:
+    """Return the total length of the union of (start, end) intervals."""
+    covered, end = 0.0, float("-inf")
+    for start, stop in sorted(intervals):
+        if stop > end:
+            covered += stop - max(start, end)
+            end = stop
+    return covered
+
+def checkpoint_size(config: dict) -> int:
+    """Return the serialized size in bytes of the latest checkpoint of a thread."""
+    saver = fria_agent.friagent.checkpointer
+    checkpoint_tuple = saver.get_tuple(config)
+    return len(saver.serde.dumps_typed(checkpoint_tuple.checkpoint)[1])
+
+def stored_bytes(thread_id: str) -> int:
+    """Return the serialized bytes the in-memory checkpointer holds for a thread (checkpoints, blobs and writes)."""
+    saver = fria_agent.friagent.checkpointer
+    checkpoints = sum(
+        len(checkpoint[1]) + len(metadata[1])
+        for namespace in saver.storage.get(thread_id, {}).values()
+        for checkpoint, metadata, _ in namespace.values()
+    )
+    blobs = sum(len(blob[1]) for key, blob in saver.blobs.items() if key[0] == thread_id)
+    writes = sum(
+        len(write[2][1]) for key, task_writes in saver.writes.items() if key[0] == thread_id
+        for write in task_writes.values()
+    )
+    return checkpoints + blobs + writes
+
+async def replay_turn(turn_input: dict, config: dict, stats: ReplayStats) -> None:
+    """Run one turn, timing every node from its task start to its task result."""
+    started_at = {}
+    intervals = []
+    turn_started = time.perf_counter()
+    async for task in fria_agent.friagent.astream(
+            turn_input, config=config, stream_mode="tasks", durability=fria_agent.settings.CHECKPOINT_DURABILITY):
+        now = time.perf_counter()
+        if "input" in task:
+            started_at[task["id"]] = now
+        else:
+            started = started_at.pop(task["id"])
+            stats.node_latencies[task["name"]].append(now - started)
+            intervals.append((started, now))
+    elapsed = time.perf_counter() - turn_started
+    stats.turn_latencies.append(elapsed)
+    stats.turn_overheads.append(elapsed - covered_time(intervals))
+
+async def replay(sessions: list[dict], concurrency: int, stats: ReplayStats, think_time: float = 0.0) -> None:
+    """Replay all sessions, at most concurrency at a time, pausing think_time seconds between turns."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def replay_session(session: dict) -> None:
+        async with semaphore:
+            thread_id = str(uuid.uuid4())
+            config = {"configurable": {"thread_id": thread_id}}
+            stored = 0
+            for turn, turn_input in enumerate(session_inputs(session)):
+                if turn and think_time:
+                    await asyncio.sleep(think_time)
+                await replay_turn(turn_input, config, stats)
+                stats.checkpoint_sizes[turn].append(checkpoint_size(config))
+                stats.bytes_written[turn].append(stored_bytes(thread_id) - stored)
+                stored += stats.bytes_written[turn][-1]
+
+    await asyncio.gather(*(replay_session(session) for session in sessions))
+
+def percentiles(values: list[float]) -> tuple[float, float, float]:
+    """Return p50, p95 and p99 of values."""
+    if len(values) < 2:
+        return (values[0],) * 3 if values else (0.0,) * 3
+    quantiles = statistics.quantiles(values, n=100, method="inclusive")
+    return quantiles[49], quantiles[94], quantiles[98]
+
+def report(stats: ReplayStats, sessions: int, elapsed: float, llm_calls: int) -> None:
+    """Print the replay results."""
+    print(f"sessions={sessions} turns={len(stats.turn_latencies)} llm_calls={llm_calls} "
+          f"wall={elapsed:.2f}s sessions/s={sessions / elapsed:.1f}")
+    print(f"\n{'node':<32}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = sorted(stats.node_latencies.items(), key=lambda item: -statistics.fmean(item[1]))
+    rows += [("TURN (wall)", stats.turn_latencies), ("TURN (graph overhead)", stats.turn_overheads)]
+    for name, values in rows:
+        p50, p95, p99 = percentiles(values)
+        print(f"{name:<32}{len(values):>7}{p50 * 1000:>10.2f}{p95 * 1000:>10.2f}{p99 * 1000:>10.2f}")
+    print(f"\n{'after turn':<12}{'sessions':>10}{'mean checkpoint bytes':>24}{'mean bytes written':>22}")
+    for turn, sizes in sorted(stats.checkpoint_sizes.items()):
+        print(f"{turn:<12}{len(sizes):>10}{statistics.fmean(sizes):>24.0f}"
+              f"{statistics.fmean(stats.bytes_written[turn]):>22.0f}")
+
+async def main(args: argparse.Namespace) -> None:
+    """Replay the fixture sessions against the stub and print the report."""
+    logging.disable(logging.INFO)
+    fria_agent.llm = StubLLMClient(latency=args.latency)
+    sessions = load_sessions(args.fixture) * args.repeat
+    stats = ReplayStats()
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the graph nodes print debug output
+        started = time.perf_counter()
+        await replay(sessions, args.concurrency, stats, args.think_time)
+        elapsed = time.perf_counter() - started
+
+    report(stats, len(sessions), elapsed, fria_agent.llm.calls)
+    if fria_agent.settings.SPECULATIVE_QUESTIONS_ENABLED:
+        print(f"\nspeculative questions: {fria_agent.speculative_questions.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default=FIXTURE_PATH, help="JSON file with recorded sessions")
+    parser.add_argument("--repeat", type=int, default=20, help="times each recorded session is replayed")
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions replayed at the same time")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency per call in seconds")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds the user takes to answer each question")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+"""Deterministic stand-in for AzureOpenAIClient used by the offline benchmarks."""
+import re
+import json
+import asyncio
+from src.app.core.llm_usage import record_usage
+
+FIELDS = ["incident", "operability", "vehicle_condition", "battery_condition"]
+
+STUB_ANSWERS = {
+    "incident": "car stopped on the highway",
+    "operability": "no",
+    "vehicle_condition": "front bumper damaged",
+    "battery_condition": "dead",
+}
+
+SERIOUS_MARKERS = ("injured", "hurt", "bleeding", "ambulance", "on fire", "trapped")
+
+class StubLLMClient:
+    """
+    Answers every prompt template of the FRIA agent with a fixed, well-formed
+    response after an artificial network latency. Transcriptions mentioning an
+    injury or fire are classified SERIOUS, everything else gets `sentiment`.
+    """
+    def __init__(self, latency: float = 0.5, sentiment: str = "NORMAL"):
+        self.latency = latency
+        self.sentiment = sentiment
+        self.model = "stub"
+        self.calls = 0
+
+    async def get_chat_response(self, messages: list[dict], **_options) -> str:
+        """Return a canned completion for the rendered prompt; client options are ignored."""
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        response = self.respond(messages[-1]["content"])
+        record_usage(_options.get("template_name"), len(messages[-1]["content"]) // 4, len(response) // 4,
+                     latency_ms=round(self.latency * 1000))
+        return response
+
+    async def stream_chat_response(self, messages: list[dict], **_options):
+        """Yield the canned completion word by word, spreading the latency over the words."""
+        self.calls += 1
+        response = self.respond(messages[-1]["content"])
+        words = response.split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.latency / len(words))
+            yield word if index == 0 else " " + word
+        record_usage(_options.get("template_name"), len(messages[-1]["content"]) // 4, len(response) // 4,
+                     latency_ms=round(self.latency * 1000))
+
+    def respond(self, prompt: str) -> str:
+        """Build the canned completion for a prompt without any delay."""
+        if "You are a user-sentiment-analysis agent" in prompt:
+            transcription = re.findall(r"audio transcription:-(.*)", prompt)[-1].lower()
+            return "SERIOUS" if any(marker in transcription for marker in SERIOUS_MARKERS) else self.sentiment
+        if "You are an information-extraction and validation agent" in prompt:
+            field = _field_in(prompt, r"field to extract:-\s*(\w+)")
+            fields = [field] if field else FIELDS  # no field left: answer them all, as the extraction agent does
+            return json.dumps({"extracted_information": {name: STUB_ANSWERS[name] for name in fields},
+                               "validation_status": {name: "SUCCESSED" for name in fields}})
+        if "You are an information-extraction agent" in prompt:
+            field = _field_in(prompt, r"field to extract:-\s*(\w+)")
+            return json.dumps({field: STUB_ANSWERS[field]} if field else STUB_ANSWERS)
+        if "You are a validation agent" in prompt:
+            field = _field_in(prompt, r'"(\w+)":\s*MISSING/')
+            fields = [field] if "CASE 2 Input" in prompt and field else FIELDS
+            return json.dumps({name: "SUCCESSED" for name in fields})
+        if "You are a conversation-summarization agent" in prompt:
+            return "The user's car stopped on the highway and they answered the agent's questions."
+        return "Got it, I'm here with you. Can the car move right now — yes or no?"
+
+def _field_in(prompt: str, pattern: str) -> str | None:
+    """Return the last known field name matched by pattern in the prompt."""
+    matches = [m.group(1) for m in re.finditer(pattern, prompt) if m.group(1) in FIELDS]
+    return matches[-1] if matches else None
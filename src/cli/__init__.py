@@ -0,0 +1,3 @@
+"""
+Command line entry points of the FRIA backend, run with python -m src.cli.<name>.
+"""
@@ -0,0 +1,42 @@
+"""
+Run a JSONL file of recorded call transcripts through the audio branch of the FRIA agent.
+
+Each input line is a BatchTranscriptSchema object, e.g.
+    {"id": "call-17", "recorded_transcription": "My Tesla hit the rail ...", "vehicle_type": "Model 3"}
+Results are written as NDJSON in completion order, one line per transcript.
+
+Run from the project root:
+    python -m src.cli.batch_transcripts transcripts.jsonl -o results.jsonl --concurrency 16
+"""
+import json
+import time
+import asyncio
+import argparse
+from fastapi.encoders import jsonable_encoder
+from src.app.core.config import settings
+from src.app.core.log_config import setup_logging
+from src.app.infrastructure.clients.async_sql_client import AsyncSQLClient
+from src.app.services.batch_service import run_batch
+
+logger = setup_logging("BATCH TRANSCRIPTS")
+
+async def main(args: argparse.Namespace) -> None:
+    """Process the input file and write one result line per transcript."""
+    counts = {"success": 0, "error": 0}
+    started = time.perf_counter()
+    with open(args.input, encoding="utf-8") as source, open(args.output, "w", encoding="utf-8") as sink:
+        async for result in run_batch(AsyncSQLClient(), source, args.concurrency):
+            counts[result["status"]] += 1
+            sink.write(json.dumps(jsonable_encoder(result)) + "\n")
+            sink.flush()
+    logger.info("Processed %d transcripts (%d failed) in %.1fs",
+                counts["success"] + counts["error"], counts["error"], time.perf_counter() - started)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file with one transcript per line")
+    parser.add_argument("-o", "--output", required=True,
+                        help="NDJSON results file (stdout carries the application logs)")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_MAX_CONCURRENCY,
+                        help="transcripts processed at the same time")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""
+Export the messages, audio transcripts or GPS locations to NDJSON or CSV.
+
+Rows are read through a server-side cursor (SQLClient.iter_batches) and written
+batch by batch as they arrive, so memory stays constant however many rows are
+exported. Rows are written in table order unless --session-id restricts the
+export to one session, which is written oldest first. The export reads one consistent snapshot, in one
+transaction that stays open until the export finishes.
+
+Run from the project root:
+    python -m src.cli.export_table messages -o messages.ndjson
+    python -m src.cli.export_table audio_transcripts -o transcripts.csv --format csv --since 2026-01-01
+    python -m src.cli.export_table geo_locations -o locations.ndjson --session-id <session id>
+"""
+import csv
+import json
+import time
+import argparse
+import datetime
+from src.app.core.config import settings
+from src.app.core.log_config import setup_logging
+from src.app.infrastructure.clients.sql_client import SQLClient
+
+logger = setup_logging("EXPORT TABLE")
+
+EXPORT_COLUMNS = {
+    "messages": "id, session_id, user_id, role, content, created_at",
+    "audio_transcripts": "id, session_id, user_id, transcription_text, created_at",
+    "geo_locations": "id, session_id, user_id, latitude, longitude, address, created_at",
+}
+
+def _json_value(value):
+    """Return a JSON-serializable form of a value json cannot encode (UUIDs, datetimes, decimals)."""
+    return value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else str(value)
+
+def export_query(table: str, session_id: str | None, since: datetime.datetime | None) -> tuple[str, dict]:
+    """Return the SELECT query and parameters exporting table, filtered by session and creation time."""
+    conditions, params = [], {}
+    if session_id:
+        conditions.append("session_id = :session_id")
+        params["session_id"] = session_id
+    if since:
+        conditions.append("created_at >= :since")
+        params["since"] = since
+    query = f"SELECT {EXPORT_COLUMNS[table]} FROM {table}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if session_id:
+        query += " ORDER BY created_at, id"
+    return query, params
+
+def main(args: argparse.Namespace) -> None:
+    """Stream the table to the output file."""
+    query, params = export_query(args.table, args.session_id, args.since)
+    exported = 0
+    started = time.perf_counter()
+    with open(args.output, "w", encoding="utf-8", newline="") as sink:
+        writer = None
+        if args.format == "csv":
+            writer = csv.DictWriter(sink, fieldnames=[column.strip() for column in EXPORT_COLUMNS[args.table].split(",")])
+            writer.writeheader()
+        for batch in SQLClient().iter_batches(query, params, args.batch_size):
+            if writer:
+                writer.writerows(batch)
+            else:
+                sink.writelines(json.dumps(row, default=_json_value) + "\n" for row in batch)
+            exported += len(batch)
+    logger.info("Exported %d %s rows to %s in %.1fs", exported, args.table, args.output, time.perf_counter() - started)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", choices=sorted(EXPORT_COLUMNS), help="table to export")
+    parser.add_argument("-o", "--output", required=True, help="output file (stdout carries the application logs)")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson", help="output format")
+    parser.add_argument("--session-id", help="export the rows of this session only")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat, help="export rows created at or after this UTC time")
+    parser.add_argument("--batch-size", type=int, default=settings.DB_STREAM_BATCH_SIZE,
+                        help="rows fetched from the server at a time")
+    main(parser.parse_args())
@@ -1,12 +1,9 @@
-"""Check for existing tables in the database and seed initial data if necessary."""
-from typing import Set
-from sqlalchemy import inspect
+"""Apply the schema migrations and seed initial data if necessary."""
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from src.app.core.log_config import setup_logging
-from src.app.core.database import engine
 from src.app.core.database import SessionLocal
-from src.app.infrastructure.db.models import Base
+from src.database.migrations import migrate
 
 from src.app.infrastructure.db.models import UserProfile, VehicleInfo, InsurancePolicyDetails
 
@@ -66,25 +63,6 @@ insurance_policy_seed_data = [
 ]
 
 
-
-def check_for_tables_or_seed_create():
-    """
-    Check if any tables defined in models exist in the database or not.
-    If given tables doesn't exist, seed the database by creating specific tables.
-    """
-    inspector = inspect(engine)
-    existing_tables: Set[str] = set(inspector.get_table_names())
-    expected_tables: Set[str] = set(Base.metadata.tables.keys())
-
-    missing = sorted(expected_tables - existing_tables)
-    if not missing:
-        logger.info("All tables exist. Nothing to create.")
-        return []
-    logger.info("Missing tables detected: %s. Creating...", missing)
-    Base.metadata.create_all(bind=engine, tables=[Base.metadata.tables[t] for t in missing])
-    logger.info("Created tables: %s", missing)
-    return missing
-
 def seed_data_to_tables(db: Session = SessionLocal()):
     """
     Seed initial data to tables.
@@ -130,9 +108,9 @@ def seed_data_to_tables(db: Session = SessionLocal()):
     finally:
         db.close()
 if __name__ == "__main__":
-    logger.info("Adding the tables to database")
-    check_for_tables_or_seed_create()
-    logger.info("Added the tables to database")
+    logger.info("Migrating the database schema")
+    migrate()
+    logger.info("Migrated the database schema")
     logger.info("Seeding initial data to tables if not present")
     seed_data_to_tables()
     logger.info("Seeded initial data to tables if not present")
@@ -0,0 +1,307 @@
+"""
+Versioned schema migrations of the FRIA PostgreSQL database.
+
+Every migration runs once, in version order, and is recorded in the
+schema_migrations table. Transactional migrations are applied and recorded in
+one transaction. The others (CREATE INDEX CONCURRENTLY, which cannot run in a
+transaction and does not block writes on a live table) run statement by
+statement in autocommit mode, so their statements must be idempotent. A
+concurrent index build that fails leaves an INVALID index behind: drop it
+before running the migrations again. A session-level advisory lock keeps
+concurrent runs (e.g. several deploy jobs) from applying the same migration twice.
+
+Migrations are snapshots: add a new one rather than editing an applied one,
+and mirror schema changes in src/app/infrastructure/db/models.py.
+
+Run from the project root:
+    python3 -m src.database.migrations            # apply pending migrations
+    python3 -m src.database.migrations --status   # list applied and pending migrations
+"""
+import argparse
+from dataclasses import dataclass
+from typing import Callable
+from sqlalchemy import Connection, text
+from src.app.core.log_config import setup_logging
+from src.app.core.database import engine
+
+logger = setup_logging("MIGRATIONS")
+
+MIGRATION_LOCK_KEY = 7_346_120_021  # pg_advisory_lock key shared by every migration run
+
+CREATE_VERSION_TABLE = """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT (NOW() AT TIME ZONE 'utc')
+)"""
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    One schema change.
+
+    :param version: position in the migration order, never reused.
+    :param name: short description, recorded in schema_migrations.
+    :param steps: SQL statements, or functions taking the connection, run in order.
+    :param transactional: run all steps and the version record in one transaction.
+    """
+    version: int
+    name: str
+    steps: tuple[str | Callable[[Connection], None], ...]
+    transactional: bool = True
+
+# Tables as they were when migrations were introduced; later changes are later migrations.
+BASELINE_TABLES = (
+    """CREATE TABLE IF NOT EXISTS agent_checkpoint_blobs (
+        thread_id VARCHAR NOT NULL,
+        checkpoint_ns VARCHAR NOT NULL,
+        channel VARCHAR NOT NULL,
+        version VARCHAR NOT NULL,
+        blob_type VARCHAR NOT NULL,
+        blob BYTEA,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+    )""",
+    """CREATE TABLE IF NOT EXISTS agent_checkpoint_writes (
+        thread_id VARCHAR NOT NULL,
+        checkpoint_ns VARCHAR NOT NULL,
+        checkpoint_id VARCHAR NOT NULL,
+        task_id VARCHAR NOT NULL,
+        idx INTEGER NOT NULL,
+        channel VARCHAR NOT NULL,
+        blob_type VARCHAR NOT NULL,
+        blob BYTEA,
+        task_path VARCHAR NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    )""",
+    """CREATE TABLE IF NOT EXISTS agent_checkpoints (
+        thread_id VARCHAR NOT NULL,
+        checkpoint_ns VARCHAR NOT NULL,
+        checkpoint_id VARCHAR NOT NULL,
+        parent_checkpoint_id VARCHAR,
+        checkpoint_type VARCHAR NOT NULL,
+        checkpoint_blob BYTEA NOT NULL,
+        metadata_type VARCHAR NOT NULL,
+        metadata_blob BYTEA NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS user_profiles (
+        id UUID NOT NULL,
+        name VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        contact_number VARCHAR,
+        birthdate TIMESTAMP WITHOUT TIME ZONE,
+        gender VARCHAR,
+        city VARCHAR,
+        state VARCHAR,
+        driver_license_state VARCHAR,
+        credit_score VARCHAR,
+        PRIMARY KEY (id),
+        UNIQUE (email)
+    )""",
+    """CREATE TABLE IF NOT EXISTS vehicle_info (
+        id UUID NOT NULL,
+        user_id UUID,
+        vehicle_make VARCHAR NOT NULL,
+        vehicle_model VARCHAR NOT NULL,
+        vehicle_year VARCHAR NOT NULL,
+        vehicle_vin_number VARCHAR NOT NULL,
+        license_plate VARCHAR NOT NULL,
+        vehicle_color VARCHAR,
+        odometer_reading VARCHAR,
+        usage_type VARCHAR,
+        ownership_status VARCHAR,
+        telematics_opt_in BOOLEAN,
+        avg_speed_mph VARCHAR,
+        hard_brakes_per_100mi VARCHAR,
+        annual_mileage VARCHAR,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        UNIQUE (vehicle_vin_number),
+        UNIQUE (license_plate)
+    )""",
+    """CREATE TABLE IF NOT EXISTS insurance_policy_details (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        vehicle_id UUID NOT NULL,
+        policy_start_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        policy_end_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        coverage_types TEXT,
+        liability_limit VARCHAR,
+        deductible_amount VARCHAR,
+        annual_premium_usd VARCHAR,
+        payment_method VARCHAR,
+        last_payment_date TIMESTAMP WITHOUT TIME ZONE,
+        policy_status VARCHAR,
+        claims_count VARCHAR,
+        claims_total_amount_usd VARCHAR,
+        last_claim_date TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        FOREIGN KEY(vehicle_id) REFERENCES vehicle_info (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS sessions (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        vehicle_id UUID NOT NULL,
+        user_name VARCHAR,
+        started_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        FOREIGN KEY(vehicle_id) REFERENCES vehicle_info (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS audio_transcripts (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        session_id UUID NOT NULL,
+        transcription_text TEXT NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        FOREIGN KEY(session_id) REFERENCES sessions (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS geo_locations (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        session_id UUID NOT NULL,
+        latitude VARCHAR NOT NULL,
+        longitude VARCHAR NOT NULL,
+        address TEXT,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        FOREIGN KEY(session_id) REFERENCES sessions (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS llm_usage (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        session_id UUID NOT NULL,
+        node VARCHAR NOT NULL,
+        template VARCHAR,
+        prompt_tokens INTEGER NOT NULL,
+        completion_tokens INTEGER NOT NULL,
+        latency_ms INTEGER NOT NULL,
+        cached BOOLEAN NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        FOREIGN KEY(session_id) REFERENCES sessions (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS messages (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        session_id UUID NOT NULL,
+        role VARCHAR NOT NULL,
+        content TEXT NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        FOREIGN KEY(session_id) REFERENCES sessions (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS tow_requests (
+        id UUID NOT NULL,
+        user_id UUID NOT NULL,
+        vehicle_id UUID NOT NULL,
+        insurance_id UUID NOT NULL,
+        damage_description TEXT,
+        accident_location_address TEXT,
+        is_vehicle_operable VARCHAR,
+        reason_for_towing TEXT,
+        finalized_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_profiles (id),
+        FOREIGN KEY(vehicle_id) REFERENCES vehicle_info (id),
+        FOREIGN KEY(insurance_id) REFERENCES insurance_policy_details (id)
+    )""",
+)
+
+MIGRATIONS = (
+    Migration(1, "baseline: create missing model tables", BASELINE_TABLES),
+    Migration(2, "move rows of the legacy gps_locations table into geo_locations", ("""
+        DO $$
+        BEGIN
+            IF to_regclass('gps_locations') IS NOT NULL THEN
+                INSERT INTO geo_locations (id, user_id, session_id, latitude, longitude, address, created_at)
+                SELECT id::uuid, user_id::uuid, session_id::uuid, latitude::text, longitude::text, address, created_at
+                FROM gps_locations
+                ON CONFLICT (id) DO NOTHING;
+                DROP TABLE gps_locations;
+            END IF;
+        END $$
+    """,)),
+    Migration(3, "indexes for the session, user, vehicle and insurance lookups", (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_session_id_created_at ON messages (session_id, created_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sessions_user_id_vehicle_id ON sessions (user_id, vehicle_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehicle_info_user_id ON vehicle_info (user_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_insurance_policy_details_vehicle_id ON insurance_policy_details (vehicle_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_insurance_policy_details_user_id ON insurance_policy_details (user_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_profiles_name ON user_profiles (name)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_llm_usage_session_id ON llm_usage (session_id)",
+    ), transactional=False),
+    Migration(4, "keyset pagination index on messages (session_id, created_at, id)", (
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_session_id_created_at_id ON messages (session_id, created_at, id)",
+        "DROP INDEX CONCURRENTLY IF EXISTS ix_messages_session_id_created_at",
+    ), transactional=False),
+)
+
+def _run_steps(connection: Connection, migration: Migration) -> None:
+    """Run the steps of migration on connection."""
+    for step in migration.steps:
+        if callable(step):
+            step(connection)
+        else:
+            connection.execute(text(step))
+
+def _record(connection: Connection, migration: Migration) -> None:
+    """Record migration as applied."""
+    connection.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+        {"version": migration.version, "name": migration.name},
+    )
+
+def applied_versions(connection: Connection) -> set[int]:
+    """Return the versions recorded in schema_migrations."""
+    connection.execute(text(CREATE_VERSION_TABLE))
+    return set(connection.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+def migrate() -> list[int]:
+    """
+    Apply the pending migrations in version order.
+
+    :return: the versions applied by this run.
+    """
+    applied = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as control:
+        control.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            done = applied_versions(control)
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                if migration.version in done:
+                    continue
+                logger.info("Applying migration %d: %s", migration.version, migration.name)
+                if migration.transactional:
+                    with engine.begin() as connection:
+                        _run_steps(connection, migration)
+                        _record(connection, migration)
+                else:
+                    _run_steps(control, migration)
+                    _record(control, migration)
+                applied.append(migration.version)
+        finally:
+            control.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    logger.info("Schema is up to date (%d migrations applied now).", len(applied))
+    return applied
+
+def status() -> list[tuple[int, str, bool]]:
+    """Return (version, name, applied) for every migration."""
+    with engine.begin() as connection:
+        done = applied_versions(connection)
+    return [(m.version, m.name, m.version in done) for m in sorted(MIGRATIONS, key=lambda m: m.version)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list migrations instead of applying them")
+    if parser.parse_args().status:
+        for version, name, is_applied in status():
+            print(f"{version:>4}  {'applied' if is_applied else 'pending':<8} {name}")
+    else:
+        migrate()